@@ -1,9 +1,37 @@
 import os
+import re
+import sys
 import json
 import time
+import shutil
+import uuid
+import heapq
+import atexit
+import socket
+import argparse
 import logging
+import socketserver
+import subprocess
+import queue
+import itertools
+import threading
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
-from urllib.parse import quote_plus
+from urllib.parse import quote_plus, unquote_plus, urlsplit, urlunsplit, parse_qsl
+import ssl
+import ipaddress
+import hashlib
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+import codecs
+import html as html_lib
+import asyncio
+import functools
+from html.parser import HTMLParser
+import certifi
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -11,14 +39,32 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.remote.command import Command
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
+import psutil
 import csv
 import pandas as pd # Prettify the CSV report
-
-# List to keep track of WebDriver instances
-drivers = []
+try:
+    import aiohttp  # Optional: powers the asyncio probe engine; without it the engine runs the HTTP tier in threads
+except ImportError:
+    aiohttp = None
+try:
+    import httpx  # Optional: with the h2 package it gives the HTTP tier HTTP/2 multiplexing; requests is used otherwise
+    import h2  # noqa: F401
+    import httpcore
+except ImportError:
+    httpx = None
+try:
+    import dns.resolver  # Optional: dnspython gives the DNS cache real record TTLs instead of dns_default_ttl
+except ImportError:
+    dns = None
+try:
+    import aiodns  # Optional: lets the async engine resolve DNS cache misses on the event loop instead of in threads
+except ImportError:
+    aiodns = None
 
 output_dir = 'data_output_files' # create a directory to store the output files
 os.makedirs(output_dir, exist_ok=True)
@@ -53,59 +99,602 @@ def configure_logging():
 # Configure logging
 logger = configure_logging()
 
+# ChromeDriver resolution: resolved once per process and persisted per browser version so that
+# launching a driver never has to call webdriver-manager or Selenium Manager again.
+driver_cache_file = os.path.join(output_dir, 'chromedriver_cache.json')
+offline_drivers = os.environ.get('SCRAPE_TESTER_OFFLINE', '').lower() in ('1', 'true', 'yes')
+os.environ.setdefault('SE_AVOID_STATS', 'true')  # Stop Selenium Manager from sending usage stats
+if offline_drivers:
+    os.environ.setdefault('SE_OFFLINE', 'true')  # Selenium Manager must not reach the network either
+
+def find_chrome_binary():
+    """Locate the installed Chrome/Chromium binary, honouring the CHROME_BINARY environment variable."""
+    if os.environ.get('CHROME_BINARY'):
+        return os.environ['CHROME_BINARY']
+    for name in ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome'):
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in (
+        os.path.expandvars(r'%ProgramFiles%\Google\Chrome\Application\chrome.exe'),
+        os.path.expandvars(r'%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe'),
+        os.path.expandvars(r'%LocalAppData%\Google\Chrome\Application\chrome.exe'),
+        '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+    ):
+        if os.path.isfile(path):
+            return path
+    return None
+
+def get_chrome_version(binary_path):
+    """Return the installed Chrome version string (e.g. '129.0.6668.59') or None if it cannot be read."""
+    if sys.platform.startswith('win'):
+        # chrome.exe --version opens a browser window on Windows, so read the version from the registry
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r'Software\Google\Chrome\BLBeacon') as key:
+                return winreg.QueryValueEx(key, 'version')[0]
+        except OSError:
+            return None
+    if not binary_path:
+        return None
+    try:
+        output = subprocess.run([binary_path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'\d+\.\d+\.\d+\.\d+', output)
+    return match.group(0) if match else None
+
+def load_driver_cache():
+    """Load the persisted {browser_version: paths} driver cache."""
+    try:
+        with open(driver_cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_driver_cache(cache):
+    """Persist the driver cache atomically."""
+    tmp_file = driver_cache_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=4)
+    os.replace(tmp_file, driver_cache_file)
+
+@st.cache_resource
+def resolve_chrome_paths(offline=None):
+    """Resolve the chromedriver and Chrome binary paths once per process; cached so Streamlit reruns reuse them.
+    Resolution order: CHROMEDRIVER_PATH environment variable, the on-disk cache entry for the
+    installed browser version, then webdriver-manager (skipped in offline mode, which raises instead).
+    Returns dict: {'driver_path', 'binary_path', 'browser_version'}.
+    """
+    offline = offline_drivers if offline is None else offline
+    binary_path = find_chrome_binary()
+    browser_version = get_chrome_version(binary_path)
+    cache_key = browser_version or 'unknown'
+    driver_path = os.environ.get('CHROMEDRIVER_PATH')
+
+    if not driver_path:
+        cache = load_driver_cache()
+        entry = cache.get(cache_key)
+        if entry and os.path.isfile(entry['driver_path']):
+            driver_path = entry['driver_path']
+            logger.info(f"Using cached chromedriver for Chrome {cache_key}: {driver_path}")
+        elif offline:
+            raise RuntimeError(
+                f"Offline mode: no cached chromedriver for Chrome {cache_key} in {driver_cache_file}. "
+                "Run once online or set CHROMEDRIVER_PATH."
+            )
+        else:
+            driver_version = browser_version.rsplit('.', 1)[0] if browser_version else None
+            driver_path = ChromeDriverManager(driver_version=driver_version).install()
+            cache[cache_key] = {
+                "driver_path": driver_path,
+                "binary_path": binary_path,
+                "resolved_at": datetime.now().isoformat(timespec='seconds'),
+            }
+            save_driver_cache(cache)
+            logger.info(f"Resolved chromedriver for Chrome {cache_key}: {driver_path}")
+
+    return {
+        "driver_path": driver_path,
+        "binary_path": binary_path,
+        "browser_version": browser_version,
+    }
+
+# Hard per-link WebDriver timeouts (seconds) and the wall-clock deadline the watchdog enforces per probe
+page_load_timeout = 30
+script_timeout = 10
+probe_deadline = 60
+
+def metadata_chrome_options():
+    """Build the headless Chrome options used to probe link metadata."""
+    options = Options()
+    options.add_argument('--headless')  # Run headlessly
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    # Replace ChromeDriver's 300s default page-load timeout so one tarpit site cannot pin a worker
+    options.timeouts = {'pageLoad': page_load_timeout * 1000, 'script': script_timeout * 1000}
+    # Network events in the performance log give the probe the document's HTTP status and headers
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+    return options
+
+def lean_chrome_options():
+    """Headless options for the metadata probe profile: return at DOMContentLoaded and never load images."""
+    options = metadata_chrome_options()
+    options.page_load_strategy = 'eager'
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    return options
+
+# Requests blocked through CDP Network.setBlockedURLs by the metadata probe profile
+blocked_resource_patterns = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp',  # images
+    '*.mp4', '*.webm', '*.m4v', '*.mov', '*.mp3', '*.m4a', '*.ogg', '*.wav',  # media
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',  # fonts
+    '*.css',  # stylesheets
+]
+blocked_tracker_patterns = [
+    '*doubleclick.net*', '*googlesyndication.com*', '*googleadservices.com*', '*google-analytics.com*',
+    '*googletagmanager.com*', '*googletagservices.com*', '*adservice.google.*', '*amazon-adsystem.com*',
+    '*adnxs.com*', '*criteo.com*', '*criteo.net*', '*taboola.com*', '*outbrain.com*', '*scorecardresearch.com*',
+    '*quantserve.com*', '*chartbeat.com*', '*hotjar.com*', '*connect.facebook.net*', '*facebook.com/tr*',
+    '*bat.bing.com*', '*moatads.com*', '*pubmatic.com*', '*rubiconproject.com*', '*casalemedia.com*',
+]
+
+# Probe profiles: how link-probe browsers are launched, which requests they block and when a page counts as loaded
+probe_profiles = {
+    'full': {
+        'options_factory': metadata_chrome_options,
+        'blocked_urls': [],
+        'wait_for_body': True,
+        'ready_states': ('complete',),
+    },
+    'metadata': {
+        'options_factory': lean_chrome_options,
+        'blocked_urls': blocked_resource_patterns + blocked_tracker_patterns,
+        'wait_for_body': False,  # eager page loads already return after DOMContentLoaded
+        'ready_states': ('interactive', 'complete'),
+    },
+}
+
+def block_urls(driver, patterns):
+    """Block requests matching the URL patterns in the driver's current tab via CDP."""
+    if patterns:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+def launch_chrome(options):
+    """Start a new Chrome WebDriver with the given options using the memoized driver paths."""
+    paths = resolve_chrome_paths()
+    if paths['binary_path'] and not options.binary_location:
+        options.binary_location = paths['binary_path']  # An explicit browser path keeps Selenium Manager out of the launch
+    service = Service(paths['driver_path'])
+    return webdriver.Chrome(service=service, options=options)
+
+def kill_process_tree(pids):
+    """Kill the given processes and all of their descendants. Returns the number of processes killed."""
+    procs = []
+    for pid in pids:
+        try:
+            proc = psutil.Process(pid)
+            procs.extend(proc.children(recursive=True))
+            procs.append(proc)
+        except psutil.Error:
+            pass
+    for proc in procs:
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+    gone, _ = psutil.wait_procs(procs, timeout=5)
+    return len(gone)
+
+def process_tree_rss_mb(pids):
+    """Return the combined resident memory (MB) of the given processes and all of their descendants."""
+    seen = set()
+    total = 0
+    for pid in pids:
+        try:
+            proc = psutil.Process(pid)
+            for member in [proc] + proc.children(recursive=True):
+                if member.pid not in seen:
+                    seen.add(member.pid)
+                    total += member.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+class DriverRegistry:
+    """Owns every Chrome WebDriver the process launches and tracks the PIDs of chromedriver and its Chrome children.
+    PIDs are persisted per owning process under `pid_dir` so that browsers leaked by a crashed or killed
+    process can be reaped by the next one.
+    """
+    def __init__(self, pid_dir=os.path.join(output_dir, 'driver_pids')):
+        """Initialize an empty registry and its PID directory."""
+        self.pid_dir = pid_dir
+        os.makedirs(pid_dir, exist_ok=True)
+        self.pid_file = os.path.join(pid_dir, f"{os.getpid()}.json")
+        self._lock = threading.Lock()
+        self._drivers = {}  # id(driver) -> {'driver': driver, 'procs': [{'pid', 'create_time'}]}
+        self._launched = 0
+        self._reaped = 0
+
+    def launch(self, options):
+        """Launch a Chrome WebDriver and register its process tree."""
+        driver = launch_chrome(options)
+        procs = self._snapshot_processes(driver)
+        with self._lock:
+            self._drivers[id(driver)] = {"driver": driver, "procs": procs}
+            self._launched += 1
+            self._persist()
+        return driver
+
+    def quit(self, driver):
+        """Quit a registered driver and kill any of its processes that survive driver.quit()."""
+        with self._lock:
+            entry = self._drivers.pop(id(driver), None)
+            self._persist()
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error while quitting driver: {e}")
+        if entry:
+            self._reaped += kill_process_tree(self._alive_pids(entry['procs']))
+
+    @contextmanager
+    def session(self, options):
+        """Context manager that launches a driver and always quits it."""
+        driver = self.launch(options)
+        try:
+            yield driver
+        finally:
+            self.quit(driver)
+
+    def pids(self, driver):
+        """Return the PIDs (chromedriver first) recorded for a registered driver."""
+        with self._lock:
+            entry = self._drivers.get(id(driver))
+        return [proc['pid'] for proc in entry['procs']] if entry else []
+
+    def kill(self, driver):
+        """Kill a registered driver's process tree without quitting it, so a blocked WebDriver call fails.
+        Returns the PIDs that were killed."""
+        pids = self.pids(driver)
+        kill_process_tree(pids)
+        return pids
+
+    def is_alive(self, driver):
+        """Return False if the driver's chromedriver process is known to have died (e.g. killed by the watchdog)."""
+        with self._lock:
+            entry = self._drivers.get(id(driver))
+        if not entry or not entry['procs']:
+            return True  # Nothing recorded (remote driver); let the reset decide
+        return bool(self._alive_pids(entry['procs'][:1]))
+
+    def live_count(self):
+        """Return the number of registered drivers whose chromedriver process is still running."""
+        with self._lock:
+            entries = list(self._drivers.values())
+        return sum(1 for entry in entries if self._alive_pids(entry['procs'][:1]))
+
+    def stats(self):
+        """Return live/launched browser counts and the number of processes reaped."""
+        return {
+            "browsers_live": self.live_count(),
+            "browsers_launched": self._launched,
+            "browser_processes_reaped": self._reaped,
+        }
+
+    def reap_orphans(self):
+        """Kill browsers recorded by processes that are no longer running. Returns the number killed."""
+        killed = 0
+        for filename in os.listdir(self.pid_dir):
+            owner_pid, ext = os.path.splitext(filename)
+            if ext != '.json' or not owner_pid.isdigit() or int(owner_pid) == os.getpid():
+                continue
+            if psutil.pid_exists(int(owner_pid)):
+                continue  # Owner is still alive and responsible for its own browsers
+            path = os.path.join(self.pid_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    recorded = json.load(f)
+            except (OSError, ValueError):
+                recorded = []
+            killed += kill_process_tree(self._alive_pids(recorded))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._reaped += killed
+        if killed:
+            logger.info(f"Reaped {killed} orphaned browser processes")
+        return killed
+
+    def shutdown(self):
+        """Quit every registered driver, reap orphans and remove this process's PID file."""
+        with self._lock:
+            drivers = [entry['driver'] for entry in self._drivers.values()]
+        for driver in drivers:
+            self.quit(driver)
+        self.reap_orphans()
+        try:
+            os.remove(self.pid_file)
+        except OSError:
+            pass
+
+    def _snapshot_processes(self, driver):
+        """Record chromedriver and its current child processes (Chrome and helpers)."""
+        procs = []
+        try:
+            service_proc = psutil.Process(driver.service.process.pid)
+            for proc in [service_proc] + service_proc.children(recursive=True):
+                procs.append({"pid": proc.pid, "create_time": proc.create_time()})
+        except (AttributeError, psutil.Error):
+            pass  # Remote drivers have no local service process
+        return procs
+
+    @staticmethod
+    def _alive_pids(procs):
+        """Return PIDs from the records that are still running and were not reused by another process."""
+        alive = []
+        for record in procs:
+            try:
+                if abs(psutil.Process(record['pid']).create_time() - record['create_time']) < 1:
+                    alive.append(record['pid'])
+            except psutil.Error:
+                pass
+        return alive
+
+    def _persist(self):
+        """Write this process's PID records to disk (called with the lock held)."""
+        procs = [proc for entry in self._drivers.values() for proc in entry['procs']]
+        with open(self.pid_file, 'w', encoding='utf-8') as f:
+            json.dump(procs, f)
+
+@st.cache_resource
+def get_driver_registry():
+    """Return the process-wide DriverRegistry; cached so that Streamlit reruns share one registry."""
+    registry = DriverRegistry()
+    registry.reap_orphans()
+    atexit.register(registry.shutdown)
+    return registry
+
+serp_result_selector = 'div.g'
+serp_container_selector = '#res, #search, #topstuff'  # Present on every SERP, including one past the last result
+serp_page_timeout = 8  # Seconds to wait for the next results page to arrive; kept under script_timeout
+serp_scroll_grace = 1.5  # Seconds a scrolled SERP gets to start loading more (grow or add results) before it counts as the last page
+serp_default_page_size = 10
+serp_large_page_size = 100  # Results requested per page (num=) in large-page mode
+serp_fanout_pages = 10  # Result pages fetched by the parallel fan-out (start=0, 10, 20, ...)
+serp_fanout_parallel = 3  # At most this many result pages are loaded at once, to stay polite
+serp_max_pages = 20  # Page budget per query, across resumed calls
+serp_stall_pages = 2  # Stop after this many consecutive pages without a new unique result
+serp_max_resumes = 2  # Follow-up load_and_scroll() calls main() makes after a resumable stop
+serp_resumable_stops = ('error', 'paused')
+
+def serp_url(query, start=0, num=None):
+    """Return the Google results URL for `query` starting at result offset `start`, optionally asking for `num` results."""
+    url = f"https://www.google.com/search?q={quote_plus(query)}"
+    if start:
+        url += f"&start={start}"
+    if num:
+        url += f"&num={num}"
+    return url
+
+# Resolves as soon as the next page has arrived: the old result container was detached, the URL changed
+# (start= offset), or more results were appended in place. Resolves false after the timeout.
+next_page_script = """
+const [container, selector, previousCount, oldUrl, timeoutMs, done] = arguments;
+const arrived = () => !container.isConnected || location.href !== oldUrl
+    || document.querySelectorAll(selector).length > previousCount;
+if (arrived()) return done(true);
+const observer = new MutationObserver(() => {
+    if (arrived()) { observer.disconnect(); done(true); }
+});
+observer.observe(document, {childList: true, subtree: true});
+setTimeout(() => { observer.disconnect(); done(false); }, timeoutMs);
+"""
+
 class GoogleSearchLoader:
     """A class to load and process Google search results."""
-    def __init__(self, query):
-        """Initialize the GoogleSearchLoader object with a search query."""
+    def __init__(self, query, large_pages=True):
+        """Initialize the GoogleSearchLoader object with a search query.
+        With `large_pages`, the first page asks for serp_large_page_size results and paging falls back
+        to normal-sized pages when the engine ignores that."""
         self.query = query
-        self.driver = webdriver.Chrome()
-        drivers.append(self.driver)  # Add the WebDriver instance to the list
-        
-    def load_and_scroll(self):
-        """Load search results and scroll until at least 100 items or no new items are found
-        and return the HTML content of the loaded pages."""
+        self.large_pages = large_pages
+        self.url_index = UrlIndex()  # Unique results seen so far, across every page and call
+        self.next_url = serp_url(query, num=serp_large_page_size if large_pages else None)  # Pagination cursor
+        self.pages_loaded = 0
+        self.stalled_pages = 0
+        self.stop_reason = None  # 'target', 'exhausted', 'budget', 'stalled', or resumable 'error'/'paused'
+        self.stats = {"serp_navigations": 0, "serp_in_page_loads": 0, "serp_page_size_ignored": None, "serp_pages_failed": 0}
+
+    def can_resume(self):
+        """Return True when a follow-up load_and_scroll() call could find more results from the cursor."""
+        return self.next_url is not None and self.stop_reason in serp_resumable_stops
+
+    def stop(self, reason):
+        """Record why paging stopped."""
+        self.stop_reason = reason
+        self.stats["serp_stop_reason"] = reason
+        self.stats["serp_pages_loaded"] = self.pages_loaded
+        logger.info(f"Search paging stopped after {self.pages_loaded} pages with {len(self.url_index)} unique results: {reason}")
+
+    def parse_page(self, page_number, html_content, include_html=False):
+        """Parse one loaded page and return it as {'page', 'results', 'html'}, where 'results' holds only the
+        canonicalized results not seen on earlier pages and 'html' is the prettified page when requested.
+        Also advances the page count and the no-new-results streak."""
+        soup = BeautifulSoup(html_content, 'html.parser')
+        results = self.url_index.add_all(self.parse_items(soup))
+        self.pages_loaded += 1
+        self.stalled_pages = 0 if results else self.stalled_pages + 1
+        return {'page': page_number, 'results': results, 'html': soup.prettify() if include_html else None}
+
+    def load_and_scroll(self, target=100, include_html=False, max_pages=serp_max_pages, stall_pages=serp_stall_pages):
+        """Load search results page by page, starting from the pagination cursor, and yield each page as
+        parse_page() returns it as soon as it has loaded. Stops (see stop_reason) once `target` unique results
+        are found, the results run out, `max_pages` have been loaded in total, or `stall_pages` pages in a row
+        brought nothing new. After a resumable stop, calling it again continues from the next unseen page."""
+        if self.next_url is None or self.pages_loaded >= max_pages:
+            self.stop('exhausted' if self.next_url is None else 'budget')
+            return
         options = Options()
         options.add_argument('--headless')
         options.add_argument('--disable-gpu')
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        try:
-            driver.get(f"https://www.google.com/search?q={quote_plus(self.query)}")
-            num_results = 0
-            collected_html = ""
-            wait = WebDriverWait(driver, 10)
+        with serp_driver(options) as driver:  # Driver is returned or quit (and its processes reaped) on exit
+            driver.get(self.next_url)
+            self.stats["serp_navigations"] += 1
+            page_number = self.pages_loaded + 1
 
-            while num_results < 100:
-                # Wait for the search results to load
-                wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'div.g')))
+            while True:
+                # Wait for the search results to load; the cursor stays on this page if they never do
+                try:
+                    if not self.wait_for_results(driver):
+                        self.next_url = None
+                        self.stop('exhausted')
+                        return
+                except TimeoutException:
+                    self.stop('error')
+                    return
 
-                search_items = driver.find_elements(By.CSS_SELECTOR, 'div.g')
-                num_results += len(search_items)
-                collected_html += driver.page_source
+                if self.large_pages and self.stats["serp_page_size_ignored"] is None:
+                    self.check_page_size(driver, len(driver.find_elements(By.CSS_SELECTOR, 'div.g')))
+                next_links = driver.find_elements(By.CSS_SELECTOR, 'a#pnnext')
+                self.next_url = next_links[0].get_attribute('href') if next_links else None
+                yield self.parse_page(page_number, driver.page_source, include_html)
 
-                if num_results >= 100:
+                if len(self.url_index) >= target:
+                    self.stop('target')
                     break
+                if self.pages_loaded >= max_pages:
+                    self.stop('budget')
+                    break
+                if self.stalled_pages >= stall_pages:
+                    self.stop('stalled')
+                    break
+                if not self.next_page(driver):
+                    self.stop('error' if self.next_url else 'exhausted')
+                    break
+                page_number += 1
 
-                # Try to find the "Next" button and click it
-                try:
-                    next_button = wait.until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, 'a#pnnext'))
-                    )
-                    next_button.click()
-                    time.sleep(2)  # Allow time for the page to load
-                except Exception:
-                    try:
-                        more_results_button = wait.until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, 'a.fl'))
-                        )
-                        more_results_button.click()
-                        time.sleep(2)
-                    except Exception:
-                        break
-            return collected_html
+    def load_fanout(self, target=100, pages=serp_fanout_pages, max_parallel=serp_fanout_parallel, include_html=False):
+        """Fetch result pages 1..`pages` concurrently by their start= offsets, on at most `max_parallel`
+        pooled browsers, and yield them parsed in rank order as parse_page() returns them. Pages that fail are
+        retried once after the others; afterwards the cursor points at the first page that still failed, or
+        the page after the last one fetched, so load_and_scroll() can resume without skipping results.
+        A page that loads past the end of the results is not a failure: paging stops as 'exhausted'."""
+        urls = [serp_url(self.query, start=index * serp_default_page_size) for index in range(pages)]
+        pool = BrokerPool(priority=10) if broker_available() else DriverPool(size=max_parallel, profile='full')
+        failed = []
+        end_page = None  # First page found past the end of the results
+        try:
+            with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='serp-fanout') as executor:
+                pages_html = executor.map(functools.partial(self.fetch_page, pool), urls)  # map yields in page order
+                for page_number, html_content in enumerate(pages_html, start=1):
+                    self.stats["serp_navigations"] += 1
+                    if html_content == '':
+                        end_page = end_page or page_number
+                    elif html_content is None:
+                        failed.append(page_number)
+                    else:
+                        yield self.parse_page(page_number, html_content, include_html)
+            for page_number in [page for page in failed if end_page is None or page < end_page]:
+                html_content = self.fetch_page(pool, urls[page_number - 1])
+                self.stats["serp_navigations"] += 1
+                if html_content is None:
+                    continue
+                failed.remove(page_number)
+                if html_content == '':
+                    end_page = min(end_page or page_number, page_number)
+                else:
+                    yield self.parse_page(page_number, html_content, include_html)
         finally:
-            driver.quit() #processes are terminated.
+            pool.shutdown()
+        failed = [page for page in failed if end_page is None or page < end_page]  # Nothing to miss past the end
+        self.stats["serp_pages_failed"] += len(failed)
+        self.next_url = urls[failed[0] - 1] if failed else serp_url(self.query, start=pages * serp_default_page_size)
+        if len(self.url_index) >= target:
+            self.stop('target')
+        elif failed:
+            self.stop('paused')  # Resuming re-fetches from the failed page; results already seen are deduplicated
+        elif end_page:
+            self.next_url = None
+            self.stop('exhausted')
+        else:
+            self.stop('stalled' if self.stalled_pages >= serp_stall_pages else 'paused')
+
+    def fetch_page(self, pool, url):
+        """Load one result page on a pooled browser. Returns its HTML, '' when the page is past the end of
+        the results, or None when it failed."""
+        try:
+            with pool.driver() as driver:
+                driver.get(url)
+                return driver.page_source if self.wait_for_results(driver) else ''
+        except Exception as e:
+            logger.warning(f"Search page {url} failed: {e}")
+            return None
+
+    def wait_for_results(self, driver, timeout=10):
+        """Wait for the loaded result page. Returns True when it has results and False when it is a SERP past
+        the end of them (no results and no Next link); raises TimeoutException for anything else."""
+        WebDriverWait(driver, timeout).until(EC.any_of(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, serp_result_selector)),
+            EC.presence_of_element_located((By.CSS_SELECTOR, serp_container_selector)),
+        ))
+        if driver.find_elements(By.CSS_SELECTOR, serp_result_selector):
+            return True
+        if driver.find_elements(By.CSS_SELECTOR, 'a#pnnext'):
+            raise TimeoutException("Result page has a Next link but no results")
+        return False
+
+    def check_page_size(self, driver, count):
+        """Record whether the first large page was honoured. A page of default size that still offers a
+        next page means the result-count parameter was ignored, so paging carries on at the default size."""
+        has_next = bool(driver.find_elements(By.CSS_SELECTOR, 'a#pnnext, a.fl'))
+        self.stats["serp_page_size_ignored"] = count <= serp_default_page_size + 2 and has_next
+        if self.stats["serp_page_size_ignored"]:
+            logger.info(f"num={serp_large_page_size} was ignored ({count} results on the first page); paging normally")
+
+    def next_page(self, driver):
+        """Click "Next" (or "More results"), or scroll a continuous-scroll SERP, and wait for the new results
+        themselves instead of a fixed sleep. Returns False when there is no further page or it never arrived;
+        without a button, a page that does not start loading more within serp_scroll_grace is the last one."""
+        buttons = driver.find_elements(By.CSS_SELECTOR, 'a#pnnext') or driver.find_elements(By.CSS_SELECTOR, 'a.fl')
+        container = driver.find_element(By.CSS_SELECTOR, serp_result_selector)
+        old_url = driver.current_url
+        previous_count = len(driver.find_elements(By.CSS_SELECTOR, serp_result_selector))
+        if buttons:
+            buttons[0].click()
+        else:
+            # Continuous scroll loads in place; a page that neither grows nor adds results is the last one
+            height = driver.execute_script("window.scrollTo(0, document.body.scrollHeight); return document.body.scrollHeight;")
+            try:
+                WebDriverWait(driver, serp_scroll_grace, poll_frequency=0.1).until(lambda d: d.execute_script(
+                    "return document.body.scrollHeight > arguments[0]"
+                    " || document.querySelectorAll(arguments[1]).length > arguments[2];",
+                    height, serp_result_selector, previous_count
+                ))
+            except TimeoutException:
+                return False
+        try:
+            arrived = driver.execute_async_script(
+                next_page_script, container, serp_result_selector, previous_count, old_url, serp_page_timeout * 1000
+            )
+            navigated = arrived and driver.current_url != old_url
+        except Exception:
+            # A full navigation aborts the script (or leaves `container` stale); confirm the page really changed
+            try:
+                WebDriverWait(driver, serp_page_timeout, poll_frequency=0.1).until(
+                    EC.any_of(EC.staleness_of(container), EC.url_changes(old_url))
+                )
+                arrived = navigated = True
+            except TimeoutException:
+                return False
+        if arrived:
+            self.stats["serp_navigations" if navigated else "serp_in_page_loads"] += 1
+        return arrived
 
     def save_html(self, html_content, base_filename="Google_search_results.html"): # html_content (str): The HTML content to save and base_filename (str): The base name of the file without the extension.
         """Save the HTML content to a timestamped file with pretty print."""
@@ -133,8 +722,8 @@ class GoogleSearchLoader:
         return json_filename # str: The path to the saved JSON file.
 
     def parse_items(self, html_content):
-        """Parse search items from HTML content using BeautifulSoup."""
-        soup = BeautifulSoup(html_content, 'html.parser') # html_content (str): The HTML content to parse.
+        """Parse search items from HTML content (or an already parsed BeautifulSoup) using BeautifulSoup."""
+        soup = html_content if isinstance(html_content, BeautifulSoup) else BeautifulSoup(html_content, 'html.parser') # html_content (str): The HTML content to parse.
         results = []
         search_items = soup.select('div.g')  # Adjust the selector as needed
         for item in search_items:
@@ -152,106 +741,2698 @@ class GoogleSearchLoader:
                 })
         return results # list: A list of dictionaries containing parsed search items.
 
-def get_page_metadata(link):
+# URL canonicalization: unwrap redirectors and strip fragments/tracking so each distinct page is probed once
+tracking_params = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'srsltid',
+}
+tracking_param_prefixes = ('utm_', 'pk_', 'hsa_')
+# Short names that only track clicks on the sites that set them and may select content anywhere else
+host_tracking_params = [
+    (re.compile(r'(^|\.)google\.[a-z.]+$'), {'ved', 'usg', 'ei', 'sa'}),
+    (re.compile(r'(^|\.)(alibaba|aliexpress|taobao|tmall)\.[a-z.]+$'), {'spm'}),
+    (re.compile(r'(^|\.)(twitter|x)\.com$'), {'ref_src'}),
+]
+default_ports = {'http': 80, 'https': 443}
+
+def unwrap_redirector(link):
+    """Return the target of a Google /url?q= (or ?url=) redirector link, or the link unchanged."""
+    for _ in range(3):  # Redirectors are occasionally nested
+        parts = urlsplit(link)
+        host = (parts.hostname or '').lower()
+        if parts.path != '/url' or (host and not re.match(r'^(www\.)?google\.[a-z.]+$', host)):
+            break
+        params = dict(parse_qsl(parts.query))
+        target = params.get('q') or params.get('url')
+        if not target or not target.startswith(('http://', 'https://')):
+            break
+        link = target
+    return link
+
+def canonicalize_url(link):
+    """Return the canonical form of a result link to probe, or None when it is not an http(s) URL.
+    Unwraps redirectors, drops the fragment (including #:~:text= fragments) and tracking params,
+    lowercases scheme and host, and removes default ports."""
+    parts = urlsplit(unwrap_redirector(link.strip()))
+    scheme = parts.scheme.lower()
+    if scheme not in default_ports or not parts.hostname:
+        return None
+    host = parts.hostname.rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, default_ports[scheme]) else f"{host}:{port}"
+    query = '&'.join(
+        param for param in parts.query.split('&')
+        if param and not is_tracking_param(unquote_plus(param.partition('=')[0]).lower(), host)
+    )  # Kept as raw text so the remaining params keep their original encoding
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+def is_tracking_param(name, host=''):
+    """Return True for query parameters that only track the click and never select content,
+    either on any host or on `host` in particular."""
+    if name in tracking_params or name.startswith(tracking_param_prefixes):
+        return True
+    return any(name in params for pattern, params in host_tracking_params if pattern.search(host))
+
+def url_dedup_key(canonical):
+    """Return the dedup hash of a canonical URL; http/https, trailing slashes and query order do not matter."""
+    parts = urlsplit(canonical)
+    path = parts.path.rstrip('/') or '/'
+    query = '&'.join(sorted(parts.query.split('&')))
+    return hashlib.sha1(f"{parts.netloc}{path}?{query}".encode('utf-8')).hexdigest()
+
+class UrlIndex:
+    """Hash index of canonical URLs seen in a run, so each distinct page is probed once."""
+    def __init__(self):
+        """Initialize an empty index."""
+        self._keys = set()
+        self.duplicates = 0
+        self.rejected = 0
+
+    def add_all(self, items):
+        """Canonicalize parsed search items and return those not seen before, with 'link' replaced by the
+        canonical URL and the original kept as 'original_link' when it differs."""
+        unique = []
+        for item in items:
+            canonical = canonicalize_url(item['link']) if item.get('link') else None
+            if canonical is None:
+                self.rejected += 1
+                continue
+            key = url_dedup_key(canonical)
+            if key in self._keys:
+                self.duplicates += 1
+                continue
+            self._keys.add(key)
+            if canonical != item['link']:
+                item = {**item, 'link': canonical, 'original_link': item['link']}
+            unique.append(item)
+        return unique
+
+    def __len__(self):
+        """Return the number of distinct pages indexed."""
+        return len(self._keys)
+
+    def stats(self):
+        """Return how many links were kept, merged as duplicates, or rejected as non-http."""
+        return {"unique_links": len(self._keys), "duplicate_links": self.duplicates, "rejected_links": self.rejected}
+
+class DriverPool:
+    """A bounded, thread-safe pool of headless Chrome drivers that link tests borrow and return.
+    Drivers are recycled after `max_pages` pages, `max_age` seconds or when their Chrome process tree
+    exceeds `max_rss_mb` (any limit can be None to disable it). Replacements launch in the background.
+    """
+    def __init__(self, size=10, profile='full', acquire_timeout=120, registry=None,
+                 max_pages=50, max_age=900, max_rss_mb=1024):
+        """Initialize the pool; drivers for the named probe profile are launched lazily up to `size`."""
+        self.registry = registry or get_driver_registry()
+        self.size = size
+        self.profile = profile
+        self.acquire_timeout = acquire_timeout
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self.max_rss_mb = max_rss_mb
+        self._idle = queue.LifoQueue()  # LIFO keeps the most recently used (warm) drivers busy
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self._borrows = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._usage = {}  # id(driver) -> {'pages': int, 'born': float}
+        self._recycles = {}  # reason -> count
+        self._contexts = {}  # id(driver) -> CDP browser context its current tab lives in
+        self._recycler = ThreadPoolExecutor(max_workers=2, thread_name_prefix='driver-recycle')
+
+    def acquire(self):
+        """Borrow a driver, launching one if the pool is below its size, otherwise waiting for a return."""
+        if self._closed:
+            raise RuntimeError("DriverPool has been shut down")
+        start = time.monotonic()
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_launch = self._created < self.size
+                if can_launch:
+                    self._created += 1
+            if can_launch:
+                try:
+                    driver = self._launch()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    driver = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No driver available after {self.acquire_timeout}s")
+        waited = time.monotonic() - start
+        with self._lock:
+            self._borrows += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return driver
+
+    def release(self, driver, discard=False):
+        """Return a driver to the pool after clearing its state; broken (or `discard`ed) drivers are quit
+        and worn-out drivers are recycled in the background."""
+        if not self._closed and not discard and self.registry.is_alive(driver):
+            reason = self._retire_reason(driver)
+            if reason:
+                with self._lock:
+                    self._recycles[reason] = self._recycles.get(reason, 0) + 1
+                self._recycler.submit(self._recycle, driver, reason)
+                return
+            try:
+                self._reset(driver)
+                self._idle.put(driver)
+                return
+            except Exception as e:
+                logger.warning(f"Discarding driver that failed to reset: {e}")
+        self._discard(driver)
+
+    @contextmanager
+    def driver(self):
+        """Context manager that borrows a driver and always returns it."""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def _launch(self):
+        """Launch a driver configured for the pool's probe profile."""
+        settings = probe_profiles[self.profile]
+        driver = self.registry.launch(settings['options_factory']())
+        try:
+            if not self._new_context(driver):
+                block_urls(driver, settings['blocked_urls'])
+        except Exception:
+            self.registry.quit(driver)
+            raise
+        with self._lock:
+            self._usage[id(driver)] = {"pages": 0, "born": time.monotonic()}
+        return driver
+
+    def _retire_reason(self, driver):
+        """Count a served page and return why the driver should be recycled ('pages', 'age', 'rss') or None."""
+        with self._lock:
+            usage = self._usage.get(id(driver))
+            if usage is None:
+                return None
+            usage['pages'] += 1
+            pages, age = usage['pages'], time.monotonic() - usage['born']
+        if self.max_pages and pages >= self.max_pages:
+            return 'pages'
+        if self.max_age and age >= self.max_age:
+            return 'age'
+        if self.max_rss_mb and process_tree_rss_mb(self.registry.pids(driver)) >= self.max_rss_mb:
+            return 'rss'
+        return None
+
+    def _recycle(self, driver, reason):
+        """Launch a replacement into the idle queue, then quit the retired driver (runs in the background)."""
+        logger.info(f"Recycling driver ({reason})")
+        try:
+            replacement = self._launch() if not self._closed else None
+        except Exception as e:
+            logger.warning(f"Failed to launch replacement driver: {e}")
+            replacement = None
+        if replacement is not None:
+            with self._lock:
+                self._created += 1  # The replacement takes over the retired driver's slot
+            if self._closed:
+                self._discard(replacement)
+            else:
+                self._idle.put(replacement)
+        self._discard(driver)
+
+    def _reset(self, driver):
+        """Give the driver a fresh browser context for its next borrow and park it on about:blank.
+        Disposing the old context drops the cookies and storage of every origin the page touched, redirect
+        hops and third-party frames included. Without context support, the current origin is cleared instead."""
+        if self._new_context(driver):
+            return
+        handles = driver.window_handles
+        for handle in handles[1:]:  # Close popups the page may have opened
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass  # Storage is not accessible on every origin (e.g. about:blank, data: URLs)
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def _new_context(self, driver):
+        """Move the driver to an about:blank tab in a new CDP browser context, closing its other windows and
+        disposing the context they used. Returns False (changing nothing) when contexts are unavailable."""
+        try:
+            context = driver.execute_cdp_cmd('Target.createBrowserContext', {})['browserContextId']
+        except Exception:
+            return False
+        try:
+            handle = driver.execute_cdp_cmd(
+                'Target.createTarget', {'url': 'about:blank', 'browserContextId': context}
+            )['targetId']  # ChromeDriver uses CDP target ids as window handles
+            handles = driver.window_handles
+            if handle not in handles:
+                raise RuntimeError("Tab in the new browser context is not visible to ChromeDriver")
+        except Exception:
+            driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': context})
+            return False
+        for old_handle in handles:  # Popups included
+            if old_handle != handle:
+                driver.switch_to.window(old_handle)
+                driver.close()
+        driver.switch_to.window(handle)
+        with self._lock:
+            old_context = self._contexts.pop(id(driver), None)
+            self._contexts[id(driver)] = context
+        if old_context:
+            driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': old_context})
+        block_urls(driver, probe_profiles[self.profile]['blocked_urls'])  # CDP blocking is per tab
+        return True
+
+    def _discard(self, driver):
+        """Quit a driver and free its slot in the pool."""
+        with self._lock:
+            self._created -= 1
+            self._usage.pop(id(driver), None)
+            self._contexts.pop(id(driver), None)
+        self.registry.quit(driver)
+
+    def stats(self):
+        """Return pool size and borrow wait-time statistics."""
+        with self._lock:
+            return {
+                "pool_size": self.size,
+                "drivers_live": self._created,
+                "drivers_idle": self._idle.qsize(),
+                "borrows": self._borrows,
+                "wait_total_s": round(self._wait_total, 3),
+                "wait_avg_s": round(self._wait_total / self._borrows, 3) if self._borrows else 0.0,
+                "wait_max_s": round(self._wait_max, 3),
+                "recycles_total": sum(self._recycles.values()),
+                "recycle_reasons": dict(self._recycles),
+            }
+
+    def shutdown(self):
+        """Quit every idle driver; drivers still borrowed are quit when they are released."""
+        self._closed = True
+        self._recycler.shutdown(wait=True)  # Let in-flight recycles finish so their drivers are quit too
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+@contextmanager
+def standalone_driver(profile='full'):
+    """Context manager for a single throwaway driver, used when no pool is supplied."""
+    settings = probe_profiles[profile]
+    with get_driver_registry().session(settings['options_factory']()) as driver:
+        block_urls(driver, settings['blocked_urls'])
+        yield driver
+
+# Browser broker: a standalone process (`python scrape_tester_100_v1.py --broker`) that owns one global pool of
+# warm Chrome sessions and leases them to Streamlit sessions and batch runs over a Unix socket.
+broker_socket_path = os.environ.get('SCRAPE_TESTER_BROKER', os.path.join(output_dir, 'browser_broker.sock'))
+
+def webdriver_server_url(driver):
+    """Return the URL of the WebDriver server (chromedriver) behind a driver."""
+    executor = driver.command_executor
+    url = getattr(executor, '_url', None)
+    if url is None:
+        url = executor._client_config.remote_server_addr
+    return url
+
+class BrowserBroker:
+    """Leases sessions from a DriverPool to broker clients by priority, with a time limit per lease.
+    Higher `priority` values are served first; a lease that outlives its time limit is revoked and its browser quit.
+    """
+    def __init__(self, capacity=10, profile='full', max_lease=600):
+        """Initialize the broker with a pool of at most `capacity` browsers for the named probe profile."""
+        self.capacity = capacity
+        self.max_lease = max_lease
+        self.pool = DriverPool(size=capacity, profile=profile)
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (-priority, sequence)
+        self._sequence = itertools.count()
+        self._leases = {}  # lease_id -> {'driver', 'expires', 'priority'}
+        self._granted = 0
+        self._revoked = 0
+        self._rejected = 0
+        self._stop = threading.Event()
+        self._reaper = threading.Thread(target=self._reap_expired, name='broker-reaper', daemon=True)
+        self._reaper.start()
+
+    def warm(self, count):
+        """Launch `count` sessions up front so the first leases do not pay a cold start."""
+        drivers = [self.pool.acquire() for _ in range(min(count, self.capacity))]
+        for driver in drivers:
+            self.pool.release(driver)
+
+    def lease(self, priority=0, ttl=120, wait=120):
+        """Wait (up to `wait` seconds) for capacity in priority order and lease a session.
+        Returns dict: {'lease_id', 'executor_url', 'session_id', 'expires_in'}.
+        """
+        entry = (-priority, next(self._sequence))
+        deadline = time.monotonic() + wait
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            while self._waiters[0] != entry or len(self._leases) >= self.capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._rejected += 1
+                    self._cond.notify_all()
+                    raise TimeoutError(f"No browser available within {wait}s")
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiters)
+            lease_id = uuid.uuid4().hex
+            ttl = min(ttl, self.max_lease)
+            self._leases[lease_id] = {"driver": None, "expires": time.monotonic() + ttl, "priority": priority}
+            self._cond.notify_all()
+        try:
+            driver = self.pool.acquire()
+        except Exception:
+            with self._cond:
+                self._leases.pop(lease_id, None)
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            self._leases[lease_id]['driver'] = driver
+            self._granted += 1
+        return {
+            "lease_id": lease_id,
+            "executor_url": webdriver_server_url(driver),
+            "session_id": driver.session_id,
+            "expires_in": ttl,
+        }
+
+    def release(self, lease_id, discard=False):
+        """Return a leased session to the pool (or quit it when `discard` is set or the lease was aborted)."""
+        with self._cond:
+            lease = self._leases.pop(lease_id, None)
+            self._cond.notify_all()
+        if lease and lease['driver'] is not None:
+            self.pool.release(lease['driver'], discard=discard or lease.get('aborted', False))
+
+    def abort(self, lease_id):
+        """Kill the browser process tree behind a lease (the client's watchdog fired). The lease stays with
+        its client until released, and its session is then discarded. Returns the PIDs that were killed."""
+        with self._cond:
+            lease = self._leases.get(lease_id)
+            if lease is None or lease['driver'] is None:
+                return []
+            lease['aborted'] = True
+        logger.warning(f"Broker: aborting lease {lease_id}")
+        return self.pool.registry.kill(lease['driver'])
+
+    def _reap_expired(self):
+        """Revoke leases past their time limit; their browsers are quit since the client may still be using them."""
+        while not self._stop.wait(1):
+            now = time.monotonic()
+            with self._cond:
+                expired = [lease_id for lease_id, lease in self._leases.items()
+                           if lease['driver'] is not None and now > lease['expires']]
+            for lease_id in expired:
+                logger.warning(f"Broker: revoking expired lease {lease_id}")
+                self._revoked += 1
+                self.release(lease_id, discard=True)
+
+    def stats(self):
+        """Return capacity, lease and pool statistics."""
+        with self._cond:
+            stats = {
+                "broker_capacity": self.capacity,
+                "broker_profile": self.pool.profile,
+                "leases_active": len(self._leases),
+                "leases_waiting": len(self._waiters),
+                "leases_granted": self._granted,
+                "leases_revoked": self._revoked,
+                "leases_rejected": self._rejected,
+            }
+        stats.update(self.pool.stats())
+        stats.update(self.pool.registry.stats())
+        return stats
+
+    def shutdown(self):
+        """Stop the reaper and quit every browser."""
+        self._stop.set()
+        for lease_id in list(self._leases):
+            self.release(lease_id, discard=True)
+        self.pool.shutdown()
+
+class BrokerRequestHandler(socketserver.StreamRequestHandler):
+    """Serves one client connection. Requests and replies are JSON lines; a lease held by the connection
+    is released automatically when the client disconnects."""
+    def handle(self):
+        broker = self.server.broker
+        held = None
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    op = request.get('op')
+                    if op == 'lease':
+                        if held:
+                            raise ValueError("Connection already holds a lease")
+                        reply = broker.lease(request.get('priority', 0), request.get('ttl', 120), request.get('wait', 120))
+                        held = reply['lease_id']
+                    elif op == 'release':
+                        if held:
+                            broker.release(held, discard=bool(request.get('discard')))
+                        held = None
+                        reply = {}
+                    elif op == 'abort':
+                        reply = {'pids': broker.abort(request.get('lease_id'))}
+                    elif op == 'stats':
+                        reply = broker.stats()
+                    else:
+                        raise ValueError(f"Unknown op: {op}")
+                    reply['ok'] = True
+                except Exception as e:
+                    reply = {'ok': False, 'error': str(e)}
+                self.wfile.write((json.dumps(reply) + '\n').encode('utf-8'))
+                self.wfile.flush()
+        finally:
+            if held:
+                broker.release(held)  # Client went away without releasing
+
+class BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix-socket server for the BrowserBroker."""
+    daemon_threads = True
+
+def run_broker(socket_path=broker_socket_path, capacity=10, profile='full', warm=0, max_lease=600):
+    """Run the browser broker until interrupted."""
+    if os.path.exists(socket_path):
+        if broker_available(socket_path):
+            raise RuntimeError(f"A broker is already listening on {socket_path}")
+        os.remove(socket_path)  # Stale socket from a broker that died
+    broker = BrowserBroker(capacity=capacity, profile=profile, max_lease=max_lease)
+    broker.warm(warm)
+    server = BrokerServer(socket_path, BrokerRequestHandler)
+    server.broker = broker
+    logger.info(f"Browser broker listening on {socket_path} (capacity {capacity}, profile {profile}, warm {warm})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        broker.shutdown()
+        os.remove(socket_path)
+
+def broker_request(sock_file, request):
+    """Send one JSON request over a broker connection and return the reply, raising on errors."""
+    sock_file.write((json.dumps(request) + '\n').encode('utf-8'))
+    sock_file.flush()
+    line = sock_file.readline()
+    if not line:
+        raise ConnectionError("Browser broker closed the connection")
+    reply = json.loads(line)
+    if not reply.pop('ok', False):
+        raise RuntimeError(f"Browser broker error: {reply.get('error')}")
+    return reply
+
+def broker_available(socket_path=broker_socket_path):
+    """Return True if a broker is listening on the socket."""
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(socket_path):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+class AttachedRemote(webdriver.Remote):
+    """A Remote WebDriver that attaches to an existing session leased from the broker instead of creating one."""
+    def __init__(self, executor_url, session_id):
+        """Attach to `session_id` on the WebDriver server at `executor_url`."""
+        self._attach_session_id = session_id
+        super().__init__(command_executor=executor_url, options=Options())
+
+    def start_session(self, *args, **kwargs):
+        """Reuse the leased session rather than starting a new one."""
+        self.session_id = self._attach_session_id
+        self.caps = {}
+
+    def quit(self):
+        """Never end the shared session from the client; it is returned to the broker instead."""
+
+class BrokerPool:
+    """Borrows browsers from the broker with the same interface as DriverPool, so every process shares one capacity budget."""
+    def __init__(self, socket_path=broker_socket_path, priority=0, ttl=120, wait=120):
+        """Initialize the client; the probe profile is whatever the broker was started with."""
+        self.socket_path = socket_path
+        self.priority = priority
+        self.ttl = ttl
+        self.wait = wait
+        self.registry = BrokerRegistry(self)
+        self._lock = threading.Lock()
+        self._connections = {}  # id(driver) -> (socket, socket file, lease id)
+        self._borrows = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self.profile = self.broker_stats()['broker_profile']
+
+    def _connect(self):
+        """Open a connection to the broker."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.socket_path)
+        return sock
+
+    def broker_stats(self):
+        """Return the broker's own statistics."""
+        with self._connect() as sock, sock.makefile('rwb') as sock_file:
+            return broker_request(sock_file, {'op': 'stats'})
+
+    def acquire(self):
+        """Lease a session from the broker and attach a driver to it."""
+        start = time.monotonic()
+        sock = self._connect()
+        try:
+            sock_file = sock.makefile('rwb')
+            lease = broker_request(sock_file, {'op': 'lease', 'priority': self.priority, 'ttl': self.ttl, 'wait': self.wait})
+            driver = AttachedRemote(lease['executor_url'], lease['session_id'])
+        except Exception:
+            sock.close()
+            raise
+        waited = time.monotonic() - start
+        with self._lock:
+            self._connections[id(driver)] = (sock, sock_file, lease['lease_id'])
+            self._borrows += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return driver
+
+    def release(self, driver, discard=False):
+        """Give the session back to the broker."""
+        with self._lock:
+            sock, sock_file, _ = self._connections.pop(id(driver), (None, None, None))
+        if sock is None:
+            return
+        try:
+            broker_request(sock_file, {'op': 'release', 'discard': discard})
+        except Exception as e:
+            logger.warning(f"Error while releasing broker lease: {e}")  # Closing the connection releases it anyway
+        finally:
+            sock_file.close()
+            sock.close()
+
+    def abort(self, driver):
+        """Ask the broker to kill the browser behind this driver's lease. Returns the PIDs it killed."""
+        with self._lock:
+            _, _, lease_id = self._connections.get(id(driver), (None, None, None))
+        if lease_id is None:
+            return []
+        try:
+            with self._connect() as sock, sock.makefile('rwb') as sock_file:
+                return broker_request(sock_file, {'op': 'abort', 'lease_id': lease_id})['pids']
+        except Exception as e:
+            logger.warning(f"Error while aborting broker lease: {e}")
+            return []
+
+    @contextmanager
+    def driver(self):
+        """Context manager that leases a driver and always returns it."""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def stats(self):
+        """Return client-side lease wait-time statistics."""
+        with self._lock:
+            return {
+                "pool_size": "broker",
+                "borrows": self._borrows,
+                "wait_total_s": round(self._wait_total, 3),
+                "wait_avg_s": round(self._wait_total / self._borrows, 3) if self._borrows else 0.0,
+                "wait_max_s": round(self._wait_max, 3),
+            }
+
+    def shutdown(self):
+        """Release any leases still held."""
+        with self._lock:
+            drivers = list(self._connections)
+        for driver_id in drivers:
+            with self._lock:
+                sock, sock_file, _ = self._connections.pop(driver_id, (None, None, None))
+            if sock is not None:
+                sock_file.close()
+                sock.close()
+
+class BrokerRegistry:
+    """Stands in for the DriverRegistry of a BrokerPool: brokered browsers live in the broker process,
+    so the watchdog's kills and the browser statistics go through the broker."""
+    def __init__(self, pool):
+        """Initialize the view for a BrokerPool."""
+        self.pool = pool
+
+    def kill(self, driver):
+        """Abort the driver's lease; the broker kills its browser process tree."""
+        return self.pool.abort(driver)
+
+    def stats(self):
+        """Return the broker's own browsers_* statistics."""
+        return {key: value for key, value in self.pool.broker_stats().items() if key.startswith('browser')}
+
+def link_probe_pool(size=10, profile='full'):
+    """Return a BrokerPool when a browser broker is running, otherwise a local DriverPool."""
+    if broker_available():
+        logger.info(f"Using browser broker at {broker_socket_path}")
+        return BrokerPool()
+    return DriverPool(size=size, profile=profile)
+
+@contextmanager
+def serp_driver(options):
+    """Driver for loading search result pages: a high-priority broker lease when a broker is running,
+    otherwise a local browser from the driver registry."""
+    if broker_available():
+        pool = BrokerPool(priority=10)
+        with pool.driver() as driver:
+            yield driver
+    else:
+        with get_driver_registry().session(options) as driver:
+            yield driver
+
+class ProbeWatchdog:
+    """Enforces a wall-clock deadline on every in-flight probe.
+    A monitor thread checks the watched probes and, when one overruns, kills the chromedriver and Chrome
+    process tree of its driver so the blocked WebDriver call fails instead of stalling the run.
+    """
+    def __init__(self, registry=None, interval=0.5):
+        """Initialize the watchdog; the monitor thread starts with the first watched probe."""
+        self.registry = registry or get_driver_registry()
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watches = {}
+        self._tokens = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+        self._kills = 0
+
+    @contextmanager
+    def watch(self, driver, link, deadline=None):
+        """Context manager that watches one probe; the yielded dict has 'fired' set if the browser was killed."""
+        deadline = deadline or probe_deadline
+        token = next(self._tokens)
+        entry = {"driver": driver, "link": link, "deadline": deadline, "expires": time.monotonic() + deadline, "fired": False}
+        with self._lock:
+            self._watches[token] = entry
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='probe-watchdog', daemon=True)
+                self._thread.start()
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                self._watches.pop(token, None)
+
+    def _run(self):
+        """Monitor loop: kill the browser of every probe past its deadline."""
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                overdue = [entry for entry in self._watches.values() if not entry['fired'] and now > entry['expires']]
+                for entry in overdue:
+                    entry['fired'] = True
+            for entry in overdue:
+                pids = self.registry.kill(entry['driver'])
+                logger.warning(f"Watchdog: {entry['link']} exceeded its {entry['deadline']}s deadline, killed browser processes {pids}")
+                with self._lock:
+                    self._kills += 1
+
+    def stats(self):
+        """Return the number of probes whose browser was killed."""
+        with self._lock:
+            return {"watchdog_kills": self._kills}
+
+    def stop(self):
+        """Stop the monitor thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+# Collects all page metadata in a single WebDriver round-trip. Extra fields are spliced in at /*EXTRA_FIELDS*/.
+metadata_script_template = """
+const content = (selector) => {
+    const el = document.querySelector(selector);
+    return el ? (el.getAttribute('content') || '') : null;
+};
+const canonical = document.querySelector('link[rel~="canonical"]');
+const opengraph = {};
+document.querySelectorAll('meta[property^="og:"]').forEach((el) => {
+    opengraph[el.getAttribute('property').slice(3)] = el.getAttribute('content') || '';
+});
+const field = (fn) => { try { return fn(); } catch (e) { return null; } };
+return JSON.stringify({
+    title: document.title,
+    description: content('meta[name="description"]'),
+    keywords: content('meta[name="keywords"]'),
+    canonical: canonical ? canonical.href : null,
+    robots: content('meta[name="robots"]'),
+    opengraph: opengraph,
+    lang: document.documentElement.getAttribute('lang') || '',
+    link_count: document.links.length,
+    table_count: document.getElementsByTagName('table').length,
+    form_count: document.forms.length,
+    text_length: field(() => document.body.innerText.length),
+    extra: {
+/*EXTRA_FIELDS*/
+    },
+});
+"""
+
+def build_metadata_script(extra_fields=None):
+    """Build the metadata script; `extra_fields` maps result field names to JavaScript expressions."""
+    lines = [
+        f"        {json.dumps(name)}: field(() => ({expression})),"
+        for name, expression in (extra_fields or {}).items()
+    ]
+    return metadata_script_template.replace('/*EXTRA_FIELDS*/', '\n'.join(lines))
+
+def extract_metadata(driver, extra_fields=None):
+    """Extract the title, meta tags, canonical/OpenGraph data, lang and element counts from the page
+    currently loaded in `driver` with a single execute_script call. `extra_fields` ({name: JS expression})
+    adds caller-defined fields to the same call.
+    """
+    data = json.loads(driver.execute_script(build_metadata_script(extra_fields)))
+    extra = data.pop('extra')
+
+    # Keep the previous placeholder text for missing meta tags
+    if data['description'] is None:
+        data['description'] = "Description meta tag not found."
+    if data['keywords'] is None:
+        data['keywords'] = "Keywords meta tag not found."
+    data.update(extra)
+    return data # dict: The metadata dictionary.
+
+def performance_log(driver):
+    """Drain and return the driver's performance log entries; [] when performance logging is off."""
+    try:
+        return driver.execute(Command.GET_LOG, {'type': 'performance'})['value']  # Works for attached Remote sessions too
+    except Exception:
+        return []
+
+def document_response(entries):
+    """Pull the main document's response out of performance log entries drained since the navigation started:
+    status, final URL, redirect chain, content length and response headers. Returns {} when there is none."""
+    request_id = None
+    redirects = []
+    response = None
+    encoded_length = None
+    for entry in entries:
+        if '"Network.' not in entry['message']:
+            continue
+        message = json.loads(entry['message'])['message']
+        method, params = message['method'], message.get('params', {})
+        if method == 'Network.requestWillBeSent' and params.get('type') == 'Document':
+            if request_id is None and params['requestId'] == params.get('loaderId'):
+                request_id = params['requestId']  # The first navigation request is the main document
+            if params['requestId'] == request_id and 'redirectResponse' in params:
+                redirects.append({'url': params['redirectResponse']['url'], 'status': params['redirectResponse']['status']})
+        elif request_id is not None and params.get('requestId') == request_id:
+            if method == 'Network.responseReceived':
+                response = params['response']
+            elif method == 'Network.loadingFinished':
+                encoded_length = params.get('encodedDataLength')
+    if response is None:
+        return {}
+    headers = {name.lower(): value for name, value in response.get('headers', {}).items()}
+    content_length = headers.get('content-length')
+    return {
+        'http_status': response['status'],
+        'final_url': response['url'],
+        'redirect_chain': redirects,
+        'redirect_count': len(redirects),
+        'content_length': int(content_length) if str(content_length).isdigit() else encoded_length,
+        'server': headers.get('server'),
+        'response_headers': headers,
+    }
+
+def browser_verdict(metadata):
+    """Return an error message when the captured document response shows a failed page (HTTP 4xx/5xx)
+    or a block page that still has a title; None when the page really loaded. Marks soft blocks 'blocked'.
+    Soft markers ('access denied', 'captcha', ...) only count on near-empty pages."""
+    status = metadata.get('http_status')
+    title = (metadata.get('title') or '').lower()
+    markers = challenge_markers
+    if (metadata.get('text_length') or 0) < challenge_text_limit:
+        markers += soft_challenge_markers
+    if any(marker in title for marker in markers) or status in (401, 403, 429):
+        metadata['status'] = 'blocked'
+        return f"Blocked (HTTP {status}): {metadata.get('title')}"
+    if status and status >= 400:
+        metadata.pop('status', None)
+        return f"HTTP {status}"
+    return None
+
+def with_document_response(metadata, entries):
+    """Merge the document response from the performance log into browser-probe metadata.
+    Returns (metadata, error) where error comes from browser_verdict(). When network events were logged
+    but none of them is a response for the main document (DNS failure, refused connection, a
+    chrome-error:// page), the navigation failed and an error is returned."""
+    response = document_response(entries)
+    if not response and any('"Network.' in entry['message'] for entry in entries):
+        metadata.pop('status', None)
+        return metadata, "No document response (navigation failed)"
+    metadata.update(response)
+    return metadata, browser_verdict(metadata)
+
+def get_page_metadata(link, pool=None, profile='full', extra_fields=None, watchdog=None, load_budget=None):
     """
     Retrieve metadata (title, description, keywords) from a webpage using Selenium.
     
     Parameters:
     - link (str): The URL of the webpage.
+    - pool (DriverPool): Optional pool to borrow a driver from; a throwaway driver is used otherwise.
+    - profile (str): Probe profile ('full' or 'metadata') for the throwaway driver; pooled drivers use the pool's profile.
+    - extra_fields (dict): Optional {field name: JavaScript expression} evaluated in the same script call.
+    - watchdog (ProbeWatchdog): Optional watchdog enforcing the probe's wall-clock deadline.
+    - load_budget (float): Optional seconds to wait for the page; when exceeded, loading is stopped and
+      whatever title/meta tags already arrived are returned with status 'partial'.
     
     Returns:
-    tuple: A tuple containing the metadata dictionary and any error message.
+    tuple: A tuple containing the metadata dictionary and any error message. On timeouts the
+    metadata is {'status': 'timeout'} so the link is reported as a timeout rather than an error.
+    The document's HTTP status, final URL, redirect chain and headers come from the performance log;
+    4xx/5xx pages and block pages are returned with an error.
     """
+    watch = {}
+    try:
+        settings = probe_profiles[pool.profile if pool else profile]
+        with (pool.driver() if pool else standalone_driver(profile)) as driver:
+            with (watchdog.watch(driver, link) if watchdog else nullcontext({})) as watch:
+                performance_log(driver)  # Drop entries left over from the driver's previous page
+                if load_budget:
+                    metadata = get_budgeted_metadata(driver, link, load_budget, extra_fields)
+                    return with_document_response(metadata, performance_log(driver))
+                driver.get(link)
+
+                # Wait for the page to fully load
+                if settings['wait_for_body']:
+                    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+
+                metadata = extract_metadata(driver, extra_fields)
+                return with_document_response(metadata, performance_log(driver))  # Tuple containing the metadata dictionary and any error message.
+    except TimeoutException as e:
+        return {'status': 'timeout'}, f"Timed out: {e.msg or 'page load or script timeout'}"
+    except Exception as e:
+        if watch.get('fired'):
+            return {'status': 'timeout'}, f"Probe exceeded its {watch['deadline']}s deadline; browser killed by watchdog"
+        return None, str(e)
+
+def get_budgeted_metadata(driver, link, load_budget, extra_fields=None):
+    """Load `link` for at most `load_budget` seconds. If the budget runs out, stop loading with
+    window.stop() and extract whatever is already in the document, marking the result 'partial'."""
+    started = time.monotonic()
+    driver.set_page_load_timeout(load_budget)
     try:
-        # Setup Selenium WebDriver
-        options = Options()
-        options.add_argument('--headless')  # Run headlessly
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
         driver.get(link)
-        
-        # Wait for the page to fully load
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-        
-        # Extract title
-        title = driver.title
-        
-        # Initialize metadata dictionary
-        metadata = {
-            "title": title,
-            "description": "",
-            "keywords": ""
+        return extract_metadata(driver, extra_fields)
+    except TimeoutException:
+        driver.execute_script("window.stop();")
+        metadata = extract_metadata(driver, extra_fields)
+        metadata['status'] = 'partial'
+        metadata['elapsed_s'] = round(time.monotonic() - started, 3)
+        return metadata
+    finally:
+        driver.set_page_load_timeout(page_load_timeout)  # Restore the default for the next borrower
+
+def link_result(link, metadata, error):
+    """Build the result dictionary for a tested link from its metadata or error.
+    A 'status' key in the metadata overrides the default 'success'/'error' status."""
+    if error:
+        return {'link': link, 'status': 'error', 'error': error, **(metadata or {})}
+    else:
+        return {'link': link, 'status': 'success', **metadata} # dict: A dictionary with the link status and optionally error details.
+
+def test_link(link_info, pool=None, extra_fields=None, watchdog=None, load_budget=None): # link_info (dict): A dictionary containing the link and optional error handling.
+    """Test a single link by retrieving its metadata and returning a status."""
+    link = link_info['link']
+    short_circuit = dns_short_circuit(link)
+    if short_circuit is not None:
+        return short_circuit
+    metadata, error = get_page_metadata(link, pool=pool, extra_fields=extra_fields, watchdog=watchdog, load_budget=load_budget)
+    return link_result(link, metadata, error)
+
+# DNS stage: hostnames are resolved in parallel as soon as the links are parsed and cached for every probe tier
+dns_default_ttl = 300  # Seconds to keep an answer when the resolver gives no TTL
+dns_negative_ttl = 60  # Seconds to remember that a host does not exist
+dns_prefetch_workers = 32
+nxdomain_errors = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+
+def resolve_host(host):
+    """Resolve `host` to (addresses, ttl). Raises socket.gaierror when the lookup fails.
+    dnspython (when installed) supplies the record TTL; the system resolver is the fallback and the
+    final word on NXDOMAIN, since it also consults the hosts file."""
+    if dns is not None:
+        try:
+            answer = dns.resolver.resolve(host, 'A')
+            return [record.address for record in answer], answer.rrset.ttl
+        except dns.exception.DNSException:
+            pass
+    infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos)), dns_default_ttl
+
+class DnsCache:
+    """TTL-respecting in-process resolver cache shared by the HTTP clients, the async engine and the
+    NXDOMAIN short-circuit. prefetch() resolves hosts in the background; lookups of a host that is
+    still being prefetched wait for that lookup instead of starting another."""
+    def __init__(self, workers=dns_prefetch_workers):
+        """Initialize an empty cache and its background lookup threads."""
+        self._lock = threading.Lock()
+        self._entries = {}  # host -> (addresses, nxdomain, expires_at)
+        self._pending = {}  # host -> Future of an in-flight lookup
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dns-prefetch')
+        self._hits = 0
+        self._lookups = 0
+
+    def _fresh(self, host):
+        entry = self._entries.get(host)
+        if entry is not None and entry[2] > time.monotonic():
+            return entry
+        return None
+
+    def _resolve(self, host):
+        entry = ([], False, time.monotonic())  # Transient failure: leave it to the connection attempt
+        try:
+            addresses, ttl = resolve_host(host)
+            entry = (addresses, False, time.monotonic() + ttl)
+        except socket.gaierror as e:
+            if e.errno not in nxdomain_errors:
+                logger.warning(f"DNS lookup for {host} failed: {e}")
+            else:
+                entry = ([], True, time.monotonic() + dns_negative_ttl)
+        except Exception as e:  # e.g. UnicodeError for a label over 63 characters; never fail the probe over DNS
+            logger.warning(f"DNS lookup for {host} failed: {e}")
+        finally:
+            with self._lock:
+                self._lookups += 1
+                self._entries[host] = entry
+                self._pending.pop(host, None)
+        return entry
+
+    def _submit(self, host):
+        """Return the Future resolving `host`, starting a lookup unless one is in flight. Caller holds the lock."""
+        future = self._pending.get(host)
+        if future is None:
+            future = self._pending[host] = self._executor.submit(self._resolve, host)
+        return future
+
+    def prefetch(self, hosts):
+        """Start resolving every host without a fresh entry; returns how many lookups were started."""
+        started = 0
+        with self._lock:
+            for host in set(hosts):
+                if host and not is_ip_address(host) and self._fresh(host) is None and host not in self._pending:
+                    self._submit(host)
+                    started += 1
+        return started
+
+    def lookup(self, host):
+        """Return (addresses, nxdomain) for `host`, from the cache when fresh."""
+        if is_ip_address(host):
+            return [host], False
+        with self._lock:
+            entry = self._fresh(host)
+            if entry is not None:
+                self._hits += 1
+                return entry[0], entry[1]
+            future = self._submit(host)
+        addresses, nxdomain, _ = future.result()
+        return addresses, nxdomain
+
+    def cached(self, host):
+        """Return (addresses, nxdomain) for `host` when it has a fresh entry, without ever resolving; else None."""
+        if is_ip_address(host):
+            return [host], False
+        with self._lock:
+            entry = self._fresh(host)
+            if entry is None:
+                return None
+            self._hits += 1
+            return entry[0], entry[1]
+
+    def in_flight(self, host):
+        """Return the Future of a lookup of `host` already running in the background, or None."""
+        with self._lock:
+            return self._pending.get(host)
+
+    def store(self, host, addresses, nxdomain, ttl):
+        """Record an answer resolved outside the cache (the async engine's resolver)."""
+        with self._lock:
+            self._lookups += 1
+            self._entries[host] = (addresses, nxdomain, time.monotonic() + ttl)
+
+    def address(self, host):
+        """Return one cached address for `host`, or None to let the caller resolve it."""
+        addresses, _ = self.lookup(host)
+        return addresses[0] if addresses else None
+
+    def stats(self):
+        """Return lookup counts for the run metrics."""
+        with self._lock:
+            return {
+                "dns_lookups": self._lookups,
+                "dns_cache_hits": self._hits,
+                "dns_nxdomain": sum(1 for entry in self._entries.values() if entry[1]),
+            }
+
+@st.cache_resource
+def get_dns_cache():
+    """Return the process-wide DnsCache; cached so that Streamlit reruns keep their resolved hosts."""
+    return DnsCache()
+
+dns_cache = get_dns_cache()
+
+def is_ip_address(host):
+    """Return True when `host` is an IPv4 or IPv6 literal that needs no lookup."""
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+def link_hosts(search_results):
+    """Return the hostnames of the parsed search results."""
+    return [urlsplit(item['link']).hostname for item in search_results if item.get('link')]
+
+def dns_short_circuit(link):
+    """Return an error result when the link's host does not exist, so no fetch or browser is spent on it."""
+    host = urlsplit(link).hostname
+    if not host:
+        return None
+    _, nxdomain = dns_cache.lookup(host)
+    return nxdomain_result(link, host) if nxdomain else None
+
+def nxdomain_result(link, host):
+    """Build the error result for a link whose host does not exist."""
+    result = link_result(link, None, f"DNS lookup failed: {host} does not exist (NXDOMAIN)")
+    result['tier'] = 'dns'
+    return result
+
+# Tier 1 of the tiered prober: a plain pooled HTTP fetch, escalated to Chrome only when it cannot answer
+http_timeout = 10
+http_headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/129.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+challenge_markers = (
+    'cf-chl', 'challenge-platform', 'cf-browser-verification', 'just a moment...', 'attention required!',
+    'px-captcha', 'ddos-guard',
+)
+soft_challenge_markers = ('captcha', 'are you a robot', 'verify you are human', 'access denied')  # Only on near-empty pages
+challenge_statuses = (401, 403, 429, 503)  # Statuses bot walls answer with; the browser gets a chance at these
+challenge_text_limit = 2000  # Pages with at least this much visible text are never taken for soft block pages
+head_byte_cap = 256 * 1024  # Head-only fetches give up after this many bytes without seeing </head> or <body>
+body_byte_cap = 2 * 1024 * 1024  # Full-body fetches stop reading here and parse what they have
+http_deadline = 20  # Wall-clock seconds for a whole tier-1 fetch; http_timeout only bounds each read
+stream_chunk_size = 16 * 1024
+js_shell_markers = ('enable javascript', 'javascript is required', 'javascript is disabled', 'requires javascript')
+# Empty single-page-app mount point (<div id="root"></div> and friends): head-only fetches treat it as a JS shell
+js_shell_root = re.compile(r'<div\b[^>]*\bid=["\']?(?:root|app|__next|__nuxt|svelte)(?=["\'\s>])[^>]*>\s*</div>', re.IGNORECASE)
+
+http_per_host_limit = 6  # Concurrent requests (and HTTP/1.1 connections) allowed per host
+http2_enabled = True  # Use HTTP/2 through httpx when it and h2 are installed
+
+class HttpMetrics:
+    """Thread-safe counters for HTTP-tier requests, new connections, handshake time and TLS resumption.
+    The counters only grow: a run takes a snapshot() when it starts and reports stats(since=snapshot),
+    so concurrent runs sharing the process-wide instance do not zero each other's numbers."""
+    def __init__(self):
+        """Initialize all counters at zero."""
+        self._lock = threading.Lock()
+        self._counts = {'requests': 0, 'connections': 0, 'handshake_total': 0.0, 'tls_resumed': 0, 'http2_responses': 0}
+
+    def snapshot(self):
+        """Return a copy of the counters, to pass to stats() at the end of a run."""
+        with self._lock:
+            return dict(self._counts)
+
+    def record_request(self, http_version=None):
+        """Count one request sent on either a new or a reused connection."""
+        with self._lock:
+            self._counts['requests'] += 1
+            if http_version == 'HTTP/2':
+                self._counts['http2_responses'] += 1
+
+    def record_connection(self, seconds, resumed=False):
+        """Count one newly opened connection and its TCP+TLS handshake time."""
+        with self._lock:
+            self._counts['connections'] += 1
+            self._counts['handshake_total'] += seconds
+            if resumed:
+                self._counts['tls_resumed'] += 1
+
+    def stats(self, since=None):
+        """Return handshake and connection reuse statistics, counted from the `since` snapshot when given."""
+        counts = self.snapshot()
+        if since:
+            counts = {key: value - since.get(key, 0) for key, value in counts.items()}
+        requests, connections = counts['requests'], counts['connections']
+        reused = max(requests - connections, 0)
+        return {
+            "http_requests": requests,
+            "http_connections_opened": connections,
+            "http_reuse_ratio": round(reused / requests, 3) if requests else 0.0,
+            "http_handshake_total_s": round(counts['handshake_total'], 3),
+            "http_handshake_avg_s": round(counts['handshake_total'] / connections, 3) if connections else 0.0,
+            "tls_sessions_resumed": counts['tls_resumed'],
+            "http2_responses": counts['http2_responses'],
         }
-        
-        # Extract meta tags for description and keywords with improved error handling
+
+@st.cache_resource
+def get_http_metrics():
+    """Return the process-wide HttpMetrics; cached like get_http_client(), whose connections record into it."""
+    return HttpMetrics()
+
+http_metrics = get_http_metrics()
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSLContext that offers the last TLS session seen for a host, so reconnects resume instead of
+    paying a full handshake. Used by both the requests and httpx clients."""
+    def remember_session(self, server_hostname, ssl_sock):
+        """Keep `ssl_sock`'s session for the host; TLS 1.3 tickets only arrive after the handshake."""
+        session = getattr(ssl_sock, 'session', None)
+        if server_hostname and session is not None:
+            self.tls_sessions[server_hostname] = session
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True, suppress_ragged_eofs=True,
+                    server_hostname=None, session=None):
+        previous = self.tls_sockets.get(server_hostname)
+        if previous is not None and previous.fileno() != -1:
+            self.remember_session(server_hostname, previous)
+        if session is None:
+            session = self.tls_sessions.get(server_hostname)
         try:
-            description_element = driver.find_element(By.XPATH, "//meta[@name='description']")
-            metadata['description'] = description_element.get_attribute('content') if description_element else "No description found"
-        except Exception:
-            # Instead of returning immediately, set an error message in the metadata dictionary
-            metadata['description'] = "Description meta tag not found."
-        
+            ssl_sock = super().wrap_socket(sock, server_side, do_handshake_on_connect, suppress_ragged_eofs,
+                                           server_hostname, session)
+        except ValueError as e:
+            if session is None or isinstance(e, ssl.SSLError):
+                raise
+            ssl_sock = super().wrap_socket(sock, server_side, do_handshake_on_connect, suppress_ragged_eofs,
+                                           server_hostname)
+        self.remember_session(server_hostname, ssl_sock)
+        self.tls_sockets[server_hostname] = ssl_sock
+        return ssl_sock
+
+def make_ssl_context():
+    """Create the shared certificate-verifying, session-resuming client SSLContext."""
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.load_verify_locations(certifi.where())
+    context.tls_sessions = {}
+    context.tls_sockets = {}
+    return context
+
+class CachedDnsConnectionMixin:
+    """Makes a urllib3 connection dial the cached DNS answer while keeping the hostname for SNI and certificates."""
+    def _new_conn(self):
+        address = dns_cache.address(self.host)
+        if address is None:
+            return super()._new_conn()
+        dns_host, self._dns_host = self._dns_host, address
         try:
-            keywords_element = driver.find_element(By.XPATH, "//meta[@name='keywords']")
-            metadata['keywords'] = keywords_element.get_attribute('content') if keywords_element else "No keywords found"
-        except Exception:
-            # Instead of returning immediately, set an error message in the metadata dictionary
-            metadata['keywords'] = "Keywords meta tag not found."
+            return super()._new_conn()
+        finally:
+            self._dns_host = dns_host
 
-        return metadata, None  # Tuple containing the metadata dictionary and any error message.
-    except Exception as e:
-        return None, str(e)
+class MeteredHTTPConnection(CachedDnsConnectionMixin, urllib3.connection.HTTPConnection):
+    """urllib3 connection that records the time spent opening it."""
+    def connect(self):
+        started = time.monotonic()
+        super().connect()
+        http_metrics.record_connection(time.monotonic() - started)
+
+class MeteredHTTPSConnection(CachedDnsConnectionMixin, urllib3.connection.HTTPSConnection):
+    """urllib3 TLS connection that records its handshake time and whether the TLS session was resumed."""
+    def connect(self):
+        started = time.monotonic()
+        super().connect()
+        http_metrics.record_connection(time.monotonic() - started, resumed=getattr(self.sock, 'session_reused', False))
+
+    def close(self):
+        if self.sock is not None and isinstance(self.ssl_context, ResumingSSLContext):
+            self.ssl_context.remember_session(self.host, self.sock)
+        super().close()
+
+if httpx is not None:
+    class CachedDnsBackend(httpcore.SyncBackend):
+        """httpcore network backend that dials the cached DNS answer; TLS still verifies the hostname."""
+        def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+            return super().connect_tcp(dns_cache.address(host) or host, port, timeout=timeout,
+                                       local_address=local_address, socket_options=socket_options)
+
+class MeteredHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = MeteredHTTPConnection
+
+class MeteredHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = MeteredHTTPSConnection
+
+class MeteredHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host keep-alive pools use metered connections and the shared SSL context."""
+    def __init__(self, ssl_context, **kwargs):
+        """Initialize the adapter with the SSLContext every HTTPS connection should use."""
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, ssl_context=self.ssl_context, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': MeteredHTTPConnectionPool, 'https': MeteredHTTPSConnectionPool}
+
+@st.cache_resource
+def get_http_client():
+    """Return the process-wide HTTP client shared by all HTTP probes: an HTTP/2-capable httpx.Client when
+    available, otherwise a requests.Session with per-host keep-alive pools. Both resume TLS sessions.
+    Cached so that Streamlit reruns keep the same connections."""
+    ssl_context = make_ssl_context()
+    if httpx is not None and http2_enabled:
+        transport = httpx.HTTPTransport(
+            http2=True, verify=ssl_context,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=200, keepalive_expiry=30),
+        )
+        transport._pool._network_backend = CachedDnsBackend()  # httpx has no public resolver hook
+        return httpx.Client(transport=transport, headers=http_headers, follow_redirects=True, timeout=http_timeout)
+    session = requests.Session()
+    adapter = MeteredHTTPAdapter(ssl_context, pool_connections=200, pool_maxsize=http_per_host_limit)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(http_headers)
+    return session
+
+class HostSlots:
+    """Per-host semaphores that cap concurrent HTTP requests to each host."""
+    def __init__(self, limit=http_per_host_limit):
+        """Initialize with no hosts; a host's semaphore is created on first use."""
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def get(self, host):
+        """Return the semaphore for `host`."""
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.limit)
+            return self._slots[host]
+
+@st.cache_resource
+def get_host_slots():
+    """Return the process-wide HostSlots; cached so that concurrent Streamlit sessions share one per-host limit."""
+    return HostSlots()
+
+def host_slot(link):
+    """Return the semaphore limiting concurrent requests to the link's host."""
+    return get_host_slots().get(urlsplit(link).hostname or '')
+
+def httpx_tracer():
+    """Return an httpcore trace callback that records new-connection handshake time."""
+    started = {}
+
+    def trace(event_name, info):
+        if event_name == 'connection.connect_tcp.started':
+            started['connect'] = time.monotonic()
+        elif event_name == 'connection.start_tls.complete' and 'connect' in started:
+            ssl_object = info.get('return_value').get_extra_info('ssl_object') if info.get('return_value') else None
+            http_metrics.record_connection(time.monotonic() - started.pop('connect'),
+                                           resumed=bool(ssl_object and ssl_object.session_reused))
+        elif event_name == 'connection.connect_tcp.complete' and not info.get('return_value'):
+            started.pop('connect', None)
+
+    return trace
+
+def shutdown_socket(sock):
+    """Shut a socket down so a read blocked on it in another thread returns at once (close() alone does not)."""
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+def deadline_chunks(read, sock, deadline):
+    """Yield the chunks returned by `read()` (b'' at the end of the body) until time.monotonic() passes
+    `deadline`. A timer shuts `sock` down at the deadline, so a read stalled on a slow drip returns
+    instead of waiting for a full chunk; reading then just stops, as if the body had ended there."""
+    timer = threading.Timer(max(deadline - time.monotonic(), 0), shutdown_socket, (sock,)) if sock is not None else None
+    if timer is not None:
+        timer.daemon = True
+        timer.start()
+    try:
+        while time.monotonic() < deadline:
+            try:
+                chunk = read()
+            except Exception:
+                if time.monotonic() >= deadline:
+                    return  # The timer cut the read short
+                raise
+            if not chunk:
+                return
+            yield chunk
     finally:
-        if driver:
-            driver.quit()
-      
-def test_link(link_info): # link_info (dict): A dictionary containing the link and optional error handling.
-    """Test a single link by retrieving its metadata and returning a status."""
+        if timer is not None:
+            timer.cancel()
+
+@contextmanager
+def open_http_stream(link, method='GET', headers=None, deadline=None):
+    """Stream a request for `link` through the shared HTTP client, holding one of its host's slots.
+    Yields (status_code, headers, chunk iterator); leaving early closes the stream without reading the rest.
+    The body stops at `deadline` (time.monotonic(); default http_deadline from now), even mid-read."""
+    deadline = deadline or time.monotonic() + http_deadline
+    client = get_http_client()
+    with host_slot(link):
+        if httpx is not None and isinstance(client, httpx.Client):
+            trace = httpx_tracer()
+            with client.stream(method, link, headers=headers, extensions={'trace': trace}) as response:
+                http_metrics.record_request(response.http_version)
+                network_stream = response.extensions.get('network_stream')
+                sock = network_stream.get_extra_info('socket') if network_stream is not None else None
+                chunks = deadline_chunks(functools.partial(next, response.iter_bytes(), b''), sock, deadline)
+                try:
+                    yield response.status_code, response.headers, chunks
+                finally:
+                    chunks.close()  # Cancels the timer before the connection can go back to the pool
+        else:
+            with client.request(method, link, headers=headers, timeout=http_timeout, stream=True) as response:
+                http_metrics.record_request()
+                sock = getattr(getattr(response.raw, '_connection', None), 'sock', None)
+                # read1() returns whatever has arrived instead of blocking until a full chunk does
+                chunks = deadline_chunks(functools.partial(response.raw.read1, stream_chunk_size, decode_content=True),
+                                         sock, deadline)
+                try:
+                    yield response.status_code, response.headers, chunks
+                finally:
+                    chunks.close()
+
+http_errors = (requests.RequestException,) + ((httpx.HTTPError,) if httpx is not None else ())
+
+# Persistent HTTP cache: probe answers are stored with their validators and freshness so reruns can skip or revalidate fetches
+http_cache_dir = os.environ.get('SCRAPE_TESTER_HTTP_CACHE', os.path.join(output_dir, 'http_cache'))
+http_cache_max_bytes = 64 * 1024 * 1024
+http_cache_heuristic_cap = 24 * 3600  # Longest freshness guessed from Last-Modified when the server gives no lifetime
+
+def parse_cache_control(value):
+    """Parse a Cache-Control header into a {directive: value or True} dict."""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or True
+    return directives
+
+def http_date(value):
+    """Return an HTTP date header as epoch seconds, or None when it is missing or malformed."""
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+def freshness_lifetime(headers):
+    """Return how many seconds a response stays fresh, or None when it must not be stored.
+    Follows max-age and Age, then Expires, then the 10% Last-Modified heuristic."""
+    cache_control = parse_cache_control(headers.get('Cache-Control'))
+    if 'no-store' in cache_control:
+        return None
+    if 'no-cache' in cache_control:
+        return 0
+    age = int(headers['Age']) if str(headers.get('Age', '')).isdigit() else 0
+    if str(cache_control.get('max-age', '')).isdigit():
+        return max(int(cache_control['max-age']) - age, 0)
+    date = http_date(headers.get('Date')) or time.time()
+    expires = http_date(headers.get('Expires'))
+    if headers.get('Expires') is not None:
+        return max((expires or 0) - date, 0)  # An invalid Expires means already expired
+    last_modified = http_date(headers.get('Last-Modified'))
+    if last_modified is not None:
+        return min(max((date - last_modified) * 0.1, 0), http_cache_heuristic_cap)
+    return 0
+
+class HttpCache:
+    """On-disk cache of HTTP-tier answers keyed by fetch mode and URL, one JSON file per entry.
+    Fresh entries are served without a request, stale ones are revalidated with If-None-Match /
+    If-Modified-Since, and a 304 reuses the stored answer. Least recently used entries are evicted
+    once the directory grows past `max_bytes`."""
+    def __init__(self, directory=http_cache_dir, max_bytes=http_cache_max_bytes):
+        """Initialize the cache and index the entries already on disk by last use."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        self._index = OrderedDict((name, size) for _, name, size in sorted(entries))  # Least recently used first
+        self._counts = {'hits': 0, 'revalidated': 0, 'misses': 0}  # Only grow; runs report the difference from a snapshot()
+
+    def snapshot(self):
+        """Return a copy of the hit, revalidation and miss counters, to pass to stats() at the end of a run."""
+        with self._lock:
+            return dict(self._counts)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            name = os.path.basename(path)
+            if name in self._index:
+                self._index.move_to_end(name)
+        os.utime(path)  # The file's mtime records last use, so LRU order survives restarts
+        return entry if entry.get('key') == key else None
+
+    def _write(self, key, entry):
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        name = os.path.basename(path)
+        with self._lock:
+            self._index[name] = os.path.getsize(path)
+            self._index.move_to_end(name)
+            total = sum(self._index.values())
+            while total > self.max_bytes and len(self._index) > 1:
+                evicted, size = self._index.popitem(last=False)
+                total -= size
+                try:
+                    os.remove(os.path.join(self.directory, evicted))
+                except OSError:
+                    pass
+
+    def lookup(self, key):
+        """Return (entry, fresh_answer, conditional_headers) for `key`. When `fresh_answer` is set the
+        caller can skip the request; otherwise it should send `conditional_headers` with it."""
+        entry = self._read(key)
+        if entry is None:
+            return None, None, {}
+        if entry['expires_at'] > time.time():
+            with self._lock:
+                self._counts['hits'] += 1
+            return entry, entry['answer'], {}
+        conditional_headers = {}
+        if entry.get('etag'):
+            conditional_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            conditional_headers['If-Modified-Since'] = entry['last_modified']
+        return entry, None, conditional_headers
+
+    def settle(self, key, entry, status_code, headers, answer):
+        """Record the outcome of a (possibly conditional) request and return the answer to use:
+        the stored one on 304, otherwise `answer`, which is stored when the response allows it."""
+        if status_code == 304 and entry is not None:
+            with self._lock:
+                self._counts['revalidated'] += 1
+            entry['expires_at'] = time.time() + (freshness_lifetime(headers) or 0)
+            entry['etag'] = headers.get('ETag') or entry.get('etag')
+            entry['last_modified'] = headers.get('Last-Modified') or entry.get('last_modified')
+            self._write(key, entry)
+            return entry['answer']
+        with self._lock:
+            self._counts['misses'] += 1
+        lifetime = freshness_lifetime(headers)
+        validators = headers.get('ETag') or headers.get('Last-Modified')
+        if status_code in (200, 206) and lifetime is not None and (lifetime > 0 or validators):
+            self._write(key, {
+                'key': key,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'expires_at': time.time() + lifetime,
+                'stored_at': time.time(),
+                'answer': answer,
+            })
+        return answer
+
+    def stats(self, since=None):
+        """Return hit, revalidation and miss counts, counted from the `since` snapshot when given,
+        plus the cache's size on disk."""
+        with self._lock:
+            counts = {key: value - (since or {}).get(key, 0) for key, value in self._counts.items()}
+            return {
+                "http_cache_hits": counts['hits'],
+                "http_cache_revalidated": counts['revalidated'],
+                "http_cache_misses": counts['misses'],
+                "http_cache_entries": len(self._index),
+                "http_cache_bytes": sum(self._index.values()),
+            }
+
+@st.cache_resource
+def get_http_cache():
+    """Return the process-wide HttpCache; cached so that Streamlit reruns do not re-index the cache directory."""
+    return HttpCache()
+
+http_cache = get_http_cache()
+
+def parse_html_metadata(html):
+    """Parse the same metadata fields as extract_metadata() from raw HTML."""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    def content(name):
+        tag = soup.find('meta', attrs={'name': name})
+        return (tag.get('content') or '') if tag else None
+
+    canonical = soup.find('link', rel='canonical')
+    html_tag = soup.find('html')
+    metadata = {
+        "title": soup.title.get_text().strip() if soup.title else "",
+        "description": content('description'),
+        "keywords": content('keywords'),
+        "canonical": canonical.get('href') if canonical else None,
+        "robots": content('robots'),
+        "opengraph": {
+            tag['property'][3:]: tag.get('content') or ''
+            for tag in soup.find_all('meta', property=re.compile(r'^og:'))
+        },
+        "lang": html_tag.get('lang', '') if html_tag else '',
+        "link_count": len(soup.find_all(['a', 'area'], href=True)),
+        "table_count": len(soup.find_all('table')),
+        "form_count": len(soup.find_all('form')),
+    }
+    if metadata['description'] is None:
+        metadata['description'] = "Description meta tag not found."
+    if metadata['keywords'] is None:
+        metadata['keywords'] = "Keywords meta tag not found."
+    return metadata, soup
+
+def escalation_reason(status_code, html, metadata, soup):
+    """Return why a plain HTTP response is not good enough ('challenge', 'js_shell', 'missing_head') or None."""
+    body = soup.body
+    visible_text = ' '.join(
+        text.strip() for text in (body.find_all(string=True) if body else [])
+        if text.parent.name not in ('script', 'style', 'noscript', 'template') and text.strip()
+    )
+    lowered = html[:20000].lower()
+    challenged = any(marker in lowered for marker in challenge_markers + soft_challenge_markers)
+    if status_code in challenge_statuses or (challenged and len(visible_text) < challenge_text_limit):
+        return 'challenge'
+    if len(visible_text) < 200 and (soup.find('script') or any(marker in lowered for marker in js_shell_markers)):
+        return 'js_shell'
+    if not metadata['title']:
+        return 'missing_head'
+    return None
+
+class HeadParser(HTMLParser):
+    """Incremental tokenizer that collects <head> metadata and notes when the head has ended."""
+    def __init__(self):
+        """Initialize an empty parser; feed it decoded text chunks."""
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self.lang = ''
+        self.canonical = None
+        self.meta = {}
+        self.opengraph = {}
+        self._title = None
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = dict(attrs)
+        if tag == 'html':
+            self.lang = attrs.get('lang') or ''
+        elif tag == 'title' and self._title is None:
+            self._in_title = True
+            self._title = []
+        elif tag == 'meta':
+            name = attrs.get('name')
+            if name and name not in self.meta:
+                self.meta[name] = attrs.get('content') or ''
+            prop = attrs.get('property') or ''
+            if prop.startswith('og:'):
+                self.opengraph[prop[3:]] = attrs.get('content') or ''
+        elif tag == 'link' and 'canonical' in (attrs.get('rel') or '').lower().split() and self.canonical is None:
+            self.canonical = attrs.get('href')
+        elif tag == 'body':
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'head':
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title.append(data)
+
+    def metadata(self):
+        """Return the head metadata in the same shape as parse_html_metadata() (element counts are unknown)."""
+        return {
+            "title": ' '.join(''.join(self._title or []).split()),
+            "description": self.meta.get('description', "Description meta tag not found."),
+            "keywords": self.meta.get('keywords', "Keywords meta tag not found."),
+            "canonical": self.canonical,
+            "robots": self.meta.get('robots'),
+            "opengraph": self.opengraph,
+            "lang": self.lang,
+        }
+
+class HeadStream:
+    """Feeds response bytes to a HeadParser until the head ends or the byte cap is hit."""
+    def __init__(self, encoding='utf-8', byte_cap=head_byte_cap):
+        """Initialize the stream for a response body in the given character encoding."""
+        try:
+            self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.parser = HeadParser()
+        self.byte_cap = byte_cap
+        self.bytes_read = 0
+        self.abort_reason = None
+        self.prefix = ''  # Start of the document, kept for challenge-page detection
+
+    def feed(self, chunk):
+        """Feed one chunk; returns True once reading can stop."""
+        self.bytes_read += len(chunk)
+        text = self.decoder.decode(chunk)
+        if len(self.prefix) < 20000:
+            self.prefix += text[:20000 - len(self.prefix)]
+        self.parser.feed(text)
+        if self.parser.done:
+            self.abort_reason = 'head_end'
+        elif self.bytes_read >= self.byte_cap:
+            self.abort_reason = 'byte_cap'
+        return self.abort_reason is not None
+
+    def finish(self):
+        """Mark the end of reading; a body that ended before the head did is reported as 'eof'."""
+        if self.abort_reason is None:
+            self.abort_reason = 'eof'
+
+def charset_from_content_type(content_type):
+    """Return the charset declared in a Content-Type header, defaulting to UTF-8."""
+    match = re.search(r'charset=["\']?([\w.:-]+)', content_type or '', re.IGNORECASE)
+    return match.group(1) if match else 'utf-8'
+
+def http_probe(link, head_only=False):
+    """Tier 1: fetch `link` over plain HTTP and parse its metadata, through the persistent HTTP cache.
+    With `head_only` the body is streamed through an incremental tokenizer and the stream is closed
+    as soon as </head> or <body> is seen (or head_byte_cap is reached).
+    Returns (metadata, reason): metadata when the response answers the probe, or None and the escalation reason.
+    """
+    key = f"{'head' if head_only else 'full'} {link}"
+    entry, answer, conditional_headers = http_cache.lookup(key)
+    if answer is not None:
+        return replayed_answer(answer, 'hit')
+    status_code, headers, answer = fetch_http_answer(link, head_only, conditional_headers)
+    answer = http_cache.settle(key, entry, status_code, headers, answer)
+    return replayed_answer(answer, 'revalidated') if status_code == 304 else tuple(answer)
+
+def replayed_answer(answer, how):
+    """Return a stored probe answer with its metadata marked 'cache': `how` ('hit' or 'revalidated'),
+    so the bytes_read recorded by the original fetch is not counted again."""
+    metadata, reason = answer
+    return (dict(metadata, cache=how) if metadata else metadata), reason
+
+def read_body(chunks, byte_cap=body_byte_cap, deadline=None):
+    """Read a response body until it ends, `byte_cap` bytes are read or time.monotonic() passes `deadline`.
+    Returns (body, abort_reason) where abort_reason is None when the whole body was read."""
+    data = bytearray()
+    for chunk in chunks:
+        data += chunk
+        if len(data) >= byte_cap:
+            return bytes(data[:byte_cap]), 'byte_cap'
+    if deadline is not None and time.monotonic() >= deadline:
+        return bytes(data), 'deadline'  # deadline_chunks() ended the body early
+    return bytes(data), None
+
+def fetch_http_answer(link, head_only=False, request_headers=None):
+    """Fetch and parse `link` for http_probe(). Returns (status_code, headers, (metadata, reason));
+    a 304 to a conditional request comes back with no answer. Reading stops at the byte cap or
+    once http_deadline has passed, and the page is parsed from what was read."""
+    deadline = time.monotonic() + http_deadline
+    with open_http_stream(link, headers=request_headers, deadline=deadline) as (status_code, headers, chunks):
+        if status_code == 304:
+            return status_code, headers, None
+        content_type = headers.get('Content-Type', '')
+        if 'html' not in content_type.lower():
+            if status_code >= 400:
+                return status_code, headers, answer_failed_status(status_code)
+            info = preflight_info(status_code, headers, 'GET', read_prefix(chunks, preflight_range_bytes))
+            if info['kind'] not in (None, 'html'):
+                return status_code, headers, (answer_non_html(link, info, tier='http'), None)
+            return status_code, headers, (None, f"content_type:{content_type.split(';')[0] or 'unknown'}")
+        charset = charset_from_content_type(content_type)
+        if head_only:
+            stream = HeadStream(charset)
+            for chunk in chunks:
+                if stream.feed(chunk):
+                    break
+            else:
+                if time.monotonic() >= deadline:
+                    stream.abort_reason = 'deadline'  # deadline_chunks() ended the body early
+            stream.finish()
+        else:
+            body, abort_reason = read_body(chunks, deadline=deadline)
+    if head_only:
+        return status_code, headers, answer_from_head(status_code, stream)
+    return status_code, headers, answer_from_html(status_code, body.decode(charset, errors='replace'), len(body), abort_reason)
+
+def answer_failed_status(status_code):
+    """HTTP-tier answer for a 4xx/5xx response that is not an HTML page (a text/plain challenge, a JSON
+    error): challenge statuses escalate to the browser, anything else is reported as an error."""
+    if status_code in challenge_statuses:
+        return None, 'challenge'
+    metadata = {'title': None, 'description': None, 'keywords': None, 'http_status': status_code, 'tier': 'http'}
+    return answer_http_error(metadata, status_code), None
+
+def answer_http_error(metadata, status_code):
+    """Mark HTTP-tier metadata as a failed page when the server answered 4xx/5xx, the way browser_verdict()
+    reports it for browser probes. Challenge statuses never get here: they escalate instead."""
+    if status_code >= 400:
+        metadata['status'] = 'error'
+        metadata['error'] = f"HTTP {status_code}"
+    return metadata
+
+def answer_from_html(status_code, html, bytes_read=None, abort_reason=None):
+    """Parse an HTML response for the HTTP tier. Returns (metadata, None) or (None, escalation reason).
+    `abort_reason` ('byte_cap' or 'deadline') is recorded when only part of the body was read."""
+    metadata, soup = parse_html_metadata(html)
+    reason = escalation_reason(status_code, html, metadata, soup)
+    if reason and not (status_code >= 400 and reason != 'challenge'):
+        return None, reason  # An error page's thin body is still an answer: the status says the page failed
+    metadata['http_status'] = status_code
+    metadata['tier'] = 'http'
+    metadata['bytes_read'] = bytes_read
+    if abort_reason:
+        metadata['abort_reason'] = abort_reason
+    return answer_http_error(metadata, status_code), None
+
+def answer_from_head(status_code, stream):
+    """Build the HTTP-tier answer from a head-only stream. Returns (metadata, None) or (None, escalation reason)."""
+    metadata = stream.parser.metadata()
+    lowered = stream.prefix.lower()
+    if status_code in challenge_statuses or any(marker in lowered for marker in challenge_markers):
+        return None, 'challenge'
+    if js_shell_root.search(stream.prefix):
+        return None, 'js_shell'  # The prefix usually runs past <body>, far enough to see an empty app root
+    if not metadata['title'] and status_code < 400:
+        return None, 'missing_head'
+    metadata['http_status'] = status_code
+    metadata['tier'] = 'http'
+    metadata['bytes_read'] = stream.bytes_read
+    metadata['abort_reason'] = stream.abort_reason
+    return answer_http_error(metadata, status_code), None
+
+# Content-type preflight: classify links with HEAD (or a ranged GET) so non-HTML documents never reach a browser
+preflight_range_bytes = 8 * 1024  # Bytes requested by the ranged-GET fallback, also used to sniff the document type
+pdf_info_bytes = 64 * 1024  # Bytes read from each end of a PDF when looking for its document info dictionary
+preflight_workers = 32
+document_kinds = (
+    ('html', ('text/html', 'application/xhtml+xml')),
+    ('pdf', ('application/pdf',)),
+    ('feed', ('application/rss+xml', 'application/atom+xml', 'application/xml', 'text/xml')),
+    ('office', ('application/msword', 'application/vnd.openxmlformats', 'application/vnd.ms-', 'application/vnd.oasis')),
+    ('image', ('image/',)),
+    ('media', ('audio/', 'video/')),
+    ('text', ('text/plain', 'text/csv', 'application/json')),
+    ('other', ('application/',)),
+)
+
+def classify_document(content_type, prefix=b''):
+    """Return the kind of document ('html', 'pdf', 'feed', 'office', 'image', ...) from its Content-Type,
+    sniffing the first bytes when the header is missing or generic. Returns None when it cannot tell."""
+    sniffed = prefix[:512].lstrip().lower()
+    if sniffed.startswith(b'%pdf'):
+        return 'pdf'
+    if sniffed.startswith(b'pk\x03\x04'):
+        return 'office'
+    if b'<rss' in sniffed or b'<feed' in sniffed:
+        return 'feed'
+    if sniffed.startswith((b'<!doctype html', b'<html')):
+        return 'html'
+    mime = content_type.split(';')[0].strip().lower()
+    if mime in ('', 'application/octet-stream', 'binary/octet-stream'):
+        return None
+    for kind, prefixes in document_kinds:
+        if mime.startswith(prefixes):
+            return kind
+    return 'other'
+
+def read_prefix(chunks, limit):
+    """Read at most `limit` bytes from a chunk iterator."""
+    data = b''
+    for chunk in chunks:
+        data += chunk
+        if len(data) >= limit:
+            break
+    return data[:limit]
+
+def preflight_info(status_code, headers, method, prefix=b''):
+    """Summarize a preflight response: status, content type, total size and document kind."""
+    content_type = headers.get('Content-Type', '')
+    content_range = headers.get('Content-Range', '')
+    if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+        content_length = int(content_range.rsplit('/', 1)[1])
+    elif status_code == 200 and headers.get('Content-Length', '').isdigit():
+        content_length = int(headers['Content-Length'])
+    else:
+        content_length = None
+    return {
+        'http_status': status_code,
+        'content_type': content_type.split(';')[0].strip() or None,
+        'content_length': content_length,
+        'kind': classify_document(content_type, prefix),
+        'method': method,
+        'prefix': prefix,
+    }
+
+def fetch_preflight(link, request_headers=None):
+    """Classify `link` with a HEAD request, falling back to a ranged GET of its first preflight_range_bytes
+    when HEAD is refused or does not name a content type. Returns the preflight_info() dict plus the
+    response headers; a 304 to a conditional request is returned as is."""
+    info = None
+    try:
+        with open_http_stream(link, method='HEAD', headers=request_headers) as (status_code, headers, _):
+            info = preflight_info(status_code, headers, 'HEAD')
+    except http_errors as e:
+        logger.debug(f"HEAD preflight of {link} failed: {e}")
+    if info is None or (info['http_status'] != 304 and (info['http_status'] >= 400 or info['kind'] is None)):
+        range_headers = {**(request_headers or {}), 'Range': f"bytes=0-{preflight_range_bytes - 1}"}
+        with open_http_stream(link, headers=range_headers) as (status_code, headers, chunks):
+            info = preflight_info(status_code, headers, 'range', read_prefix(chunks, preflight_range_bytes))
+    info['headers'] = headers
+    return info
+
+def fetch_byte_range(link, byte_range, limit):
+    """Return up to `limit` bytes of a ranged GET; servers that ignore Range are cut off after `limit` bytes."""
+    with open_http_stream(link, headers={'Range': f"bytes={byte_range}"}) as (status_code, headers, chunks):
+        if status_code >= 400:
+            return b''
+        return read_prefix(chunks, limit)
+
+pdf_escapes = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+
+def unescape_pdf_literal(match):
+    """re.sub callback for one backslash escape in a PDF literal string."""
+    escape = match.group(1)
+    if escape.isdigit():
+        return bytes([int(escape, 8) & 0xFF])
+    return pdf_escapes.get(escape, escape)
+
+def decode_pdf_string(raw, hex_string=False):
+    """Decode a PDF literal or hex string, honouring a UTF-16 byte order mark."""
+    if hex_string:
+        digits = re.sub(rb'\s', b'', raw)
+        data = bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode('ascii'))
+    else:
+        data = re.sub(rb'\\([nrtbf()\\]|[0-7]{1,3})', unescape_pdf_literal, raw)
+    if data.startswith(b'\xfe\xff'):
+        return data[2:].decode('utf-16-be', errors='replace').strip()
+    return data.decode('latin-1').strip()
+
+def pdf_document_info(data):
+    """Pull Title, Author and Subject from the uncompressed document info dictionary in `data`.
+    Info dictionaries inside compressed object streams are not found."""
+    info = {}
+    for key, field in ((b'Title', 'title'), (b'Author', 'author'), (b'Subject', 'description')):
+        match = re.search(rb'/' + key + rb'\s*(?:\(((?:\\.|[^\\)])*)\)|<([0-9A-Fa-f\s]*)>)', data, re.S)
+        if match:
+            value = decode_pdf_string(match.group(1)) if match.group(1) is not None else decode_pdf_string(match.group(2), hex_string=True)
+            if value:
+                info[field] = value
+    return info
+
+def feed_title(prefix):
+    """Return the channel/feed title from the first bytes of an RSS or Atom document."""
+    match = re.search(rb'<title[^>]*>\s*(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?\s*</title>', prefix, re.S | re.I)
+    return html_lib.unescape(match.group(1).decode('utf-8', errors='replace')).strip() if match else None
+
+def answer_non_html(link, info, tier='preflight'):
+    """Build the metadata for a non-HTML document: a 'non_html' verdict plus whatever the lightweight
+    extractor for its kind finds (PDF document info, feed title). `tier` names the stage that fetched it."""
+    metadata = {
+        'status': 'non_html',
+        'title': None,
+        'description': None,
+        'keywords': None,
+        'document_kind': info['kind'],
+        'content_type': info['content_type'],
+        'content_length': info['content_length'],
+        'http_status': info['http_status'],
+        'tier': tier,
+    }
+    try:
+        if info['kind'] == 'pdf':
+            data = fetch_byte_range(link, f"0-{pdf_info_bytes - 1}", pdf_info_bytes)
+            if info['content_length'] is None or info['content_length'] > pdf_info_bytes:
+                data += fetch_byte_range(link, f"-{pdf_info_bytes}", pdf_info_bytes)
+            metadata.update(pdf_document_info(data))
+        elif info['kind'] == 'feed':
+            metadata['title'] = feed_title(info['prefix'] or fetch_byte_range(link, f"0-{preflight_range_bytes - 1}", preflight_range_bytes))
+    except http_errors as e:
+        logger.warning(f"Could not extract {info['kind']} metadata from {link}: {e}")
+    return metadata
+
+def preflight_link(link_info):
+    """Classify a link before probing it. Returns a finished result when no browser is needed
+    (a non-HTML document, a 404/410, or a host that does not exist), or None to probe it normally."""
     link = link_info['link']
-    metadata, error = get_page_metadata(link)
-    if error:
-        return {'link': link, 'status': 'error', 'error': error}
+    short_circuit = dns_short_circuit(link)
+    if short_circuit is not None:
+        return short_circuit
+    key = f"preflight {link}"
+    entry, verdict, conditional_headers = http_cache.lookup(key)
+    if verdict is not None:
+        return verdict or None
+    try:
+        info = fetch_preflight(link, conditional_headers)
+    except http_errors as e:
+        logger.debug(f"Preflight of {link} failed, leaving it to the probe: {e}")
+        return None
+    if info['http_status'] == 304:
+        verdict = None
+    elif info['http_status'] in (404, 410):
+        verdict = link_result(link, {'http_status': info['http_status'], 'tier': 'preflight'}, f"HTTP {info['http_status']}")
+    elif info['kind'] in (None, 'html') or info['http_status'] >= 400:
+        verdict = {}  # Probe it normally
     else:
-        return {'link': link, 'status': 'success', **metadata} # dict: A dictionary with the link status and optionally error details.
+        verdict = link_result(link, answer_non_html(link, info), None)
+    return http_cache.settle(key, entry, info['http_status'], info['headers'], verdict) or None
+
+def preflight_links(search_results, max_workers=preflight_workers, run_stats=None):
+    """Preflight every link concurrently. Returns (links still to probe, finished preflight results)."""
+    to_probe, finished = [], []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='preflight') as executor:
+        for item, result in zip(search_results, executor.map(preflight_link, search_results)):
+            if result is None:
+                to_probe.append(item)
+            else:
+                finished.append(result)
+    if run_stats is not None:
+        run_stats.update({
+            "preflight_checked": len(search_results),
+            "preflight_non_html": sum(1 for result in finished if result['status'] == 'non_html'),
+            "preflight_errors": sum(1 for result in finished if result['status'] == 'error'),
+        })
+    logger.info(f"Preflight finished {len(finished)} of {len(search_results)} links without a probe")
+    return to_probe, finished
+
+# robots.txt compliance: each host's rules are fetched once per TTL, compiled to a matcher and cached on disk
+robots_agent = 'scrape-tester'  # Product token matched against User-agent lines; '*' groups apply when none match
+robots_ttl = 24 * 3600
+robots_cache_dir = os.path.join(output_dir, 'robots_cache')
+robots_max_bytes = 500 * 1024  # RFC 9309 lets crawlers ignore anything past 500 KiB
+
+def parse_robots_txt(text, agent=robots_agent):
+    """Return (rules, crawl_delay) for `agent` from a robots.txt body. `rules` is a list of
+    (allow, path pattern) from the groups naming the agent, or from the '*' groups when none do."""
+    groups = []
+    current = None
+    in_agent_lines = False
+    for line in text.splitlines():
+        field, _, value = line.split('#', 1)[0].partition(':')
+        field, value = field.strip().lower(), value.strip()
+        if field == 'user-agent':
+            if not in_agent_lines:
+                current = {'agents': [], 'rules': [], 'crawl_delay': None}
+                groups.append(current)
+            current['agents'].append(value.lower())
+            in_agent_lines = True
+            continue
+        in_agent_lines = False
+        if current is None:
+            continue
+        if field in ('allow', 'disallow') and value:  # An empty Disallow allows everything
+            current['rules'].append((field == 'allow', value))
+        elif field == 'crawl-delay':
+            try:
+                current['crawl_delay'] = float(value)
+            except ValueError:
+                pass
+    matching = [group for group in groups if agent.lower() in group['agents']]
+    matching = matching or [group for group in groups if '*' in group['agents']]
+    rules = [rule for group in matching for rule in group['rules']]
+    delays = [group['crawl_delay'] for group in matching if group['crawl_delay'] is not None]
+    return rules, (max(delays) if delays else None)
+
+def robots_pattern_regex(pattern):
+    """Compile a robots.txt path pattern: '*' matches any run of characters and a trailing '$' anchors the end."""
+    anchored = pattern.endswith('$')
+    regex = re.escape(pattern.rstrip('$')).replace(r'\*', '.*')
+    return re.compile(regex + ('$' if anchored else ''))
+
+class RobotsRules:
+    """Compiled robots.txt rules for one host. The longest matching pattern decides; Allow wins ties."""
+    def __init__(self, rules, crawl_delay=None, status='ok'):
+        """Initialize the matcher from (allow, pattern) rules."""
+        self.rules = [tuple(rule) for rule in rules]
+        self.crawl_delay = crawl_delay
+        self.status = status  # 'ok', 'missing' (4xx: everything allowed) or 'unreachable' (5xx/network: nothing allowed)
+        self._matchers = sorted(
+            ((len(pattern), allow, robots_pattern_regex(pattern)) for allow, pattern in self.rules),
+            key=lambda matcher: (-matcher[0], not matcher[1])
+        )
+
+    def allowed(self, path):
+        """Return True when `path` (path plus query) may be fetched."""
+        if path == '/robots.txt':
+            return True
+        for _, allow, regex in self._matchers:
+            if regex.match(path):
+                return allow
+        return True
+
+class RobotsCache:
+    """Per-origin robots.txt rules shared by all threads, fetched at most once per `ttl` and kept both
+    in memory and as JSON files under `directory` so reruns reuse them."""
+    def __init__(self, directory=robots_cache_dir, ttl=robots_ttl):
+        """Initialize an empty in-memory cache backed by `directory`."""
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._origin_locks = {}
+        self._rules = {}  # origin -> (RobotsRules, expires_at)
+        self.fetches = 0  # Only grows; a run reports the difference from its starting value
+
+    def _path(self, origin):
+        return os.path.join(self.directory, hashlib.sha256(origin.encode('utf-8')).hexdigest() + '.json')
+
+    def _load(self, origin):
+        try:
+            with open(self._path(origin), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('origin') != origin or saved['fetched_at'] + self.ttl <= time.time():
+            return None
+        return RobotsRules(saved['rules'], saved['crawl_delay'], saved['status']), saved['fetched_at'] + self.ttl
+
+    def _save(self, origin, rules):
+        with open(self._path(origin), 'w', encoding='utf-8') as f:
+            json.dump({'origin': origin, 'fetched_at': time.time(), 'status': rules.status,
+                       'rules': rules.rules, 'crawl_delay': rules.crawl_delay}, f)
+
+    def _fetch(self, origin):
+        """Fetch and compile robots.txt for `origin`, following RFC 9309 for failed fetches."""
+        with self._lock:
+            self.fetches += 1
+        try:
+            with open_http_stream(f"{origin}/robots.txt") as (status_code, headers, chunks):
+                body = read_prefix(chunks, robots_max_bytes) if 200 <= status_code < 300 else b''
+        except http_errors as e:
+            logger.warning(f"Could not fetch {origin}/robots.txt: {e}")
+            return RobotsRules([(False, '/')], status='unreachable')
+        if 200 <= status_code < 300:
+            rules, crawl_delay = parse_robots_txt(body.decode('utf-8', errors='replace'))
+            return RobotsRules(rules, crawl_delay)
+        if 400 <= status_code < 500:
+            return RobotsRules([], status='missing')
+        return RobotsRules([(False, '/')], status='unreachable')
+
+    def rules_for(self, origin):
+        """Return the RobotsRules for `origin` ('scheme://host[:port]'), fetching them when stale."""
+        with self._lock:
+            cached = self._rules.get(origin)
+            if cached is not None and cached[1] > time.time():
+                return cached[0]
+            origin_lock = self._origin_locks.setdefault(origin, threading.Lock())
+        with origin_lock:  # One fetch per origin even when many of its links are checked at once
+            with self._lock:
+                cached = self._rules.get(origin)
+            if cached is None or cached[1] <= time.time():
+                cached = self._load(origin)
+                if cached is None:
+                    rules = self._fetch(origin)
+                    if rules.status != 'unreachable':  # Outages are retried on the next run instead of persisting
+                        self._save(origin, rules)
+                    cached = (rules, time.time() + self.ttl)
+                with self._lock:
+                    self._rules[origin] = cached
+        return cached[0]
+
+    def check(self, link):
+        """Return the robots.txt annotation for `link`: allowed/disallowed, crawl delay and rules status."""
+        parts = urlsplit(link)
+        rules = self.rules_for(f"{parts.scheme}://{parts.netloc}")
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        return {
+            'robots_txt': 'allowed' if rules.allowed(path) else 'disallowed',
+            'crawl_delay': rules.crawl_delay,
+            'robots_status': rules.status,
+        }
+
+@st.cache_resource
+def get_robots_cache():
+    """Return the process-wide RobotsCache; cached so that Streamlit reruns keep the parsed rules."""
+    return RobotsCache()
+
+robots_cache = get_robots_cache()
+
+def check_robots(search_results, skip_disallowed=False, max_workers=preflight_workers, run_stats=None):
+    """Annotate every link with its robots.txt verdict before probing.
+    Returns (links to probe, skipped results, {link: annotation}); disallowed links are only
+    skipped when `skip_disallowed` is set."""
+    fetches_start = robots_cache.fetches
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='robots') as executor:
+        annotations = dict(zip(
+            (item['link'] for item in search_results),
+            executor.map(lambda item: robots_cache.check(item['link']), search_results)
+        ))
+    to_probe, skipped = [], []
+    for item in search_results:
+        annotation = annotations[item['link']]
+        if skip_disallowed and annotation['robots_txt'] == 'disallowed':
+            skipped.append({'link': item['link'], 'status': 'skipped', 'error': 'Disallowed by robots.txt', **annotation})
+        else:
+            to_probe.append(item)
+    if run_stats is not None:
+        run_stats.update({
+            "robots_fetches": robots_cache.fetches - fetches_start,
+            "robots_disallowed": sum(1 for annotation in annotations.values() if annotation['robots_txt'] == 'disallowed'),
+            "robots_skipped": len(skipped),
+        })
+    return to_probe, skipped, annotations
+
+def escalate_to_browser(link_info, reason, pool=None, extra_fields=None, watchdog=None, load_budget=None):
+    """Run the Selenium probe for a link the HTTP tier could not answer and record why it escalated."""
+    result = test_link(link_info, pool=pool, extra_fields=extra_fields, watchdog=watchdog, load_budget=load_budget)
+    result['tier'] = 'browser'
+    result['escalation_reason'] = reason
+    return result
+
+def test_link_tiered(link_info, pool=None, extra_fields=None, watchdog=None, load_budget=None, head_only=False):
+    """Test a link with a plain HTTP fetch first and escalate to the Selenium probe only when needed.
+    Custom `extra_fields` are JavaScript, so they always go straight to the browser."""
+    link = link_info['link']
+    short_circuit = dns_short_circuit(link)
+    if short_circuit is not None:
+        return short_circuit
+    reason = 'extra_fields'
+    if not extra_fields:
+        try:
+            metadata, reason = http_probe(link, head_only=head_only)
+            if metadata is not None:
+                return link_result(link, metadata, None)
+        except http_errors as e:
+            reason = f"http_error:{type(e).__name__}"
+    return escalate_to_browser(link_info, reason, pool, extra_fields, watchdog, load_budget)
+
+def multiplex_chrome_options(profile='full'):
+    """Headless options for tab-multiplexed probing: navigation must return immediately so other tabs keep moving."""
+    options = probe_profiles[profile]['options_factory']()
+    options.page_load_strategy = 'none'
+    return options
+
+class TabProber:
+    """Probes several links at once inside a single Chrome by spreading them across tabs.
+    Each link gets its own tab in a fresh browser context (separate cookies and storage) when the
+    browser supports CDP browser contexts, and each tab has its own timeout.
+    """
+    def __init__(self, driver, tabs=8, tab_timeout=20, isolate=True, poll_interval=0.1, profile='full', extra_fields=None,
+                 partial=False):
+        """Initialize the prober for a driver launched with multiplex_chrome_options(profile).
+        With `partial`, a tab that exceeds its timeout is stopped and its metadata returned as 'partial'."""
+        self.driver = driver
+        self.partial = partial
+        self.extra_fields = extra_fields
+        self.settings = probe_profiles[profile]
+        self.tabs = tabs
+        self.tab_timeout = tab_timeout
+        self.isolate = isolate
+        self.poll_interval = poll_interval
+        self.network = {}  # Window handle -> performance log entries for that tab
+
+    def _collect_network(self):
+        """Drain the shared performance log and file each entry under the tab (webview) it came from."""
+        for entry in performance_log(self.driver):
+            webview = json.loads(entry['message']).get('webview') if '"Network.' in entry['message'] else None
+            if webview in self.network:
+                self.network[webview].append(entry)
+
+    def probe(self, links):
+        """Probe the links with up to `tabs` in flight and return (link, metadata, error) tuples in completion order."""
+        home = self.driver.current_window_handle
+        pending = list(links)
+        active = []
+        results = []
+        try:
+            while pending or active:
+                # Fill free tabs with the next links
+                while pending and len(active) < self.tabs:
+                    link = pending.pop(0)
+                    try:
+                        handle, context = self._open_tab()
+                        self.driver.switch_to.window(handle)
+                        block_urls(self.driver, self.settings['blocked_urls'])  # CDP blocking is per tab
+                        self.network[handle] = []
+                        self.driver.get(link)  # Returns immediately with pageLoadStrategy 'none'
+                        active.append({"link": link, "handle": handle, "context": context, "started": time.monotonic()})
+                    except Exception as e:
+                        results.append((link, None, str(e)))
+
+                # Poll every in-flight tab once, then match finished tabs with their network events
+                finished = []
+                for slot in list(active):
+                    done, metadata, error = self._poll(slot)
+                    if done:
+                        finished.append((slot, metadata, error))
+                        active.remove(slot)
+                if finished:
+                    self._collect_network()
+                for slot, metadata, error in finished:
+                    entries = self.network.pop(slot['handle'], [])
+                    if metadata is not None and metadata.get('status') != 'timeout':
+                        metadata, error = with_document_response(metadata, entries)
+                    results.append((slot['link'], metadata, error))
+                    self._close_tab(slot['handle'], slot['context'])
+                if active:
+                    time.sleep(self.poll_interval)
+        finally:
+            for slot in active:
+                self._close_tab(slot['handle'], slot['context'])
+            self.network.clear()
+            self.driver.switch_to.window(home)
+        return results
+
+    def _poll(self, slot):
+        """Check one tab; returns (done, metadata, error)."""
+        try:
+            self.driver.switch_to.window(slot['handle'])
+            state, href = self.driver.execute_script("return [document.readyState, location.href];")
+            if state in self.settings['ready_states'] and href != 'about:blank':
+                return True, extract_metadata(self.driver, self.extra_fields), None
+        except Exception as e:
+            return True, None, str(e)
+        elapsed = time.monotonic() - slot['started']
+        if elapsed > self.tab_timeout:
+            if self.partial:
+                try:
+                    self.driver.execute_script("window.stop();")
+                    metadata = extract_metadata(self.driver, self.extra_fields)
+                    metadata.update({'status': 'partial', 'elapsed_s': round(elapsed, 3)})
+                    return True, metadata, None
+                except Exception:
+                    pass
+            return True, {'status': 'timeout'}, f"Tab timed out after {self.tab_timeout}s"
+        return False, None, None
+
+    def _open_tab(self):
+        """Open a tab, in its own browser context when isolation is available. Returns (handle, context_id)."""
+        if self.isolate:
+            try:
+                context = self.driver.execute_cdp_cmd('Target.createBrowserContext', {})['browserContextId']
+                handle = self.driver.execute_cdp_cmd(
+                    'Target.createTarget', {'url': 'about:blank', 'browserContextId': context}
+                )['targetId']  # ChromeDriver uses CDP target ids as window handles
+                if handle in self.driver.window_handles:
+                    return handle, context
+                self.driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': context})
+                logger.warning("Isolated browser context tabs are not visible to ChromeDriver; using shared-context tabs")
+            except Exception as e:
+                logger.warning(f"Isolated browser contexts unavailable, using shared-context tabs: {e}")
+            self.isolate = False
+        self.driver.switch_to.new_window('tab')
+        return self.driver.current_window_handle, None
 
-def test_links_concurrently(search_results): # search_results (list): A list of dictionaries representing links to test.
-    """Test a list of links concurrently and collect the results."""
+    def _close_tab(self, handle, context):
+        """Close a tab and dispose of its browser context."""
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except Exception:
+            pass
+        if context:
+            try:
+                self.driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': context})
+            except Exception:
+                pass
+
+def test_links_multiplexed(search_results, browsers=2, tabs_per_browser=8, tab_timeout=20, run_stats=None, profile='full',
+                           extra_fields=None, load_budget=None):
+    """Test links with `browsers` Chrome instances, each probing up to `tabs_per_browser` links in parallel tabs.
+    Returns results in the same shape as test_links_concurrently. With `load_budget`, tabs are given that
+    many seconds and slow pages yield 'partial' results instead of timeouts. When a browser broker is running,
+    tabs are not used: brokered sessions lack the CDP and performance-log access TabProber needs, so the links
+    are probed in pool mode with leased browsers instead of launching local ones outside the broker's budget.
+    """
+    if broker_available():
+        logger.warning("Browser broker is running; probing in pool mode with leased browsers instead of tabs")
+        return test_links_concurrently(search_results, run_stats=run_stats, profile=profile, extra_fields=extra_fields,
+                                       load_budget=load_budget)
+    registry = get_driver_registry()
     results = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {executor.submit(test_link, item): item for item in search_results}
+    links = []
+    for item in search_results:
+        short_circuit = dns_short_circuit(item['link'])
+        if short_circuit is not None:
+            results.append(short_circuit)
+        else:
+            links.append(item['link'])
+    chunks = [links[i::browsers] for i in range(browsers)]
+
+    def probe_chunk(chunk):
+        try:
+            with registry.session(multiplex_chrome_options(profile)) as driver:
+                return TabProber(
+                    driver, tabs=tabs_per_browser, tab_timeout=load_budget or tab_timeout, profile=profile,
+                    extra_fields=extra_fields, partial=bool(load_budget)
+                ).probe(chunk)
+        except Exception as e:
+            return [(link, None, str(e)) for link in chunk]
+
+    with ThreadPoolExecutor(max_workers=browsers) as executor:
+        futures = [executor.submit(probe_chunk, chunk) for chunk in chunks if chunk]
         for future in as_completed(futures):
-            result = future.result()
-            results.append(result)
+            for link, metadata, error in future.result():
+                results.append(link_result(link, metadata, error))
+    if run_stats is not None:
+        run_stats.update({"probe_mode": "tabs", "probe_profile": profile, "browsers": browsers, "tabs_per_browser": tabs_per_browser})
+        run_stats.update(registry.stats())
+    return results
+
+def test_links_concurrently(search_results, max_workers=10, pool=None, run_stats=None, profile='full', extra_fields=None,
+                            load_budget=None, tiered=False, head_only=False): # search_results (list): A list of dictionaries representing links to test.
+    """Test a list of links concurrently and collect the results.
+    Drivers are borrowed from `pool` (a DriverPool sized to `max_workers` for the named probe `profile`
+    is created and shut down when none is given). If `run_stats` is a dict it is updated with the pool statistics.
+    `extra_fields` ({name: JS expression}) adds caller-defined fields to each link's metadata.
+    Every probe runs under a ProbeWatchdog so a hung browser is killed and reported as a timeout.
+    With `load_budget` (seconds), slow pages are stopped and reported as 'partial' with what had loaded.
+    With `tiered`, each link is first fetched over plain HTTP and only escalated to a browser when needed;
+    browsers are launched lazily, so runs that never escalate never start Chrome. `head_only` makes the
+    HTTP tier stop downloading at the end of <head>.
+    """
+    tester = functools.partial(test_link_tiered, head_only=head_only) if tiered else test_link
+    http_start = http_metrics.snapshot()
+    owns_pool = pool is None
+    if owns_pool:
+        pool = link_probe_pool(size=max_workers, profile=profile)
+    watchdog = ProbeWatchdog(registry=pool.registry)
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(tester, item, pool, extra_fields, watchdog, load_budget): item for item in search_results}
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+    finally:
+        watchdog.stop()
+        logger.info(f"Driver pool stats: {pool.stats()}")
+        if owns_pool:
+            pool.shutdown()
+        if run_stats is not None:
+            run_stats["probe_mode"] = "pool"
+            run_stats["probe_profile"] = pool.profile
+            run_stats.update(pool.stats())
+            run_stats.update(pool.registry.stats())
+            run_stats.update(watchdog.stats())
+            if tiered:
+                run_stats.update(tier_stats(results))
+                run_stats.update(http_metrics.stats(since=http_start))
     return results
 
-def generate_report(test_results, query_topic):
+def tier_stats(results):
+    """Summarize which tier answered and how many bytes the HTTP tier read; answers replayed from the
+    HTTP cache are counted separately and their stored bytes_read left out."""
+    http_results = [result for result in results if result.get('tier') == 'http']
+    return {
+        "tier_http": len(http_results),
+        "tier_http_cached": sum(1 for result in http_results if result.get('cache')),
+        "tier_browser": sum(1 for result in results if result.get('tier') == 'browser'),
+        "tier_dns": sum(1 for result in results if result.get('tier') == 'dns'),
+        "http_bytes_read": sum(result.get('bytes_read') or 0 for result in http_results if not result.get('cache')),
+    }
+
+def aiohttp_trace_config():
+    """Return an aiohttp TraceConfig that feeds request and new-connection timings into http_metrics."""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_connection_create_start(session, context, params):
+        context.connect_started = time.monotonic()
+
+    async def on_connection_create_end(session, context, params):
+        http_metrics.record_connection(time.monotonic() - context.connect_started)
+
+    async def on_request_end(session, context, params):
+        http_metrics.record_request()
+
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+if aiohttp is not None:
+    class CachedAsyncResolver(aiohttp.abc.AbstractResolver):
+        """aiohttp resolver backed by the shared DNS cache, so the async engine reuses prefetched answers.
+        Misses are resolved on the event loop with aiodns (c-ares) when it is installed and written back into
+        the cache; without it they go to the cache's own lookup threads."""
+        def __init__(self):
+            """Initialize the resolver; must be called with the engine's event loop running."""
+            self._aiodns = aiodns.DNSResolver() if aiodns is not None else None
+
+        async def lookup(self, host):
+            """Return (addresses, nxdomain) for `host` without blocking the event loop."""
+            cached = dns_cache.cached(host)
+            if cached is not None:
+                return cached
+            future = dns_cache.in_flight(host)
+            if future is not None:
+                addresses, nxdomain, _ = await asyncio.wrap_future(future)  # Prefetch already on it
+                return addresses, nxdomain
+            if self._aiodns is None:
+                return await asyncio.to_thread(dns_cache.lookup, host)
+            try:
+                answer = await self._aiodns.getaddrinfo(host, family=socket.AF_UNSPEC, type=socket.SOCK_STREAM)
+            except aiodns.error.DNSError as e:
+                nxdomain = bool(e.args) and e.args[0] in (aiodns.error.ARES_ENOTFOUND, aiodns.error.ARES_ENODATA)
+                if not nxdomain:
+                    logger.warning(f"DNS lookup for {host} failed: {e}")
+                dns_cache.store(host, [], nxdomain, dns_negative_ttl if nxdomain else 0)
+                return [], nxdomain
+            except Exception as e:  # Same policy as DnsCache._resolve(): a bad hostname is a transient miss
+                logger.warning(f"DNS lookup for {host} failed: {e}")
+                dns_cache.store(host, [], False, 0)
+                return [], False
+            addresses = list(dict.fromkeys(node.addr[0].decode('ascii') for node in answer.nodes))
+            ttl = min((node.ttl for node in answer.nodes if node.ttl > 0), default=dns_default_ttl)  # Hosts-file answers carry 0
+            dns_cache.store(host, addresses, False, ttl)
+            return addresses, False
+
+        async def short_circuit(self, link):
+            """Async counterpart of dns_short_circuit()."""
+            host = urlsplit(link).hostname
+            if not host:
+                return None
+            _, nxdomain = await self.lookup(host)
+            return nxdomain_result(link, host) if nxdomain else None
+
+        async def resolve(self, host, port=0, family=socket.AF_INET):
+            addresses, nxdomain = await self.lookup(host)
+            if family in (socket.AF_INET, socket.AF_INET6):
+                addresses = [address for address in addresses if (':' in address) == (family == socket.AF_INET6)]
+            if not addresses:
+                raise OSError(socket.EAI_NONAME if nxdomain else socket.EAI_AGAIN, f"Could not resolve {host}")
+            return [
+                {'hostname': host, 'host': address, 'port': port, 'proto': 0, 'flags': socket.AI_NUMERICHOST,
+                 'family': socket.AF_INET6 if ':' in address else socket.AF_INET}
+                for address in addresses
+            ]
+
+        async def close(self):
+            if self._aiodns is not None and hasattr(self._aiodns, 'close'):
+                await self._aiodns.close()
+
+def async_resolver():
+    """Return the aiohttp resolver backed by the shared DNS cache."""
+    return CachedAsyncResolver()
+
+async def async_http_probe(session, link, head_only=False):
+    """Async tier 1: fetch `link` with aiohttp and parse its metadata off the event loop, through the
+    persistent HTTP cache. Returns (metadata, reason) like http_probe(), including the head-only streaming mode."""
+    key = f"{'head' if head_only else 'full'} {link}"
+    entry, answer, conditional_headers = await asyncio.to_thread(http_cache.lookup, key)  # Disk I/O stays off the loop
+    if answer is not None:
+        return replayed_answer(answer, 'hit')
+    status_code, headers, answer = await async_fetch_http_answer(session, link, head_only, conditional_headers)
+    answer = await asyncio.to_thread(http_cache.settle, key, entry, status_code, headers, answer)
+    return replayed_answer(answer, 'revalidated') if status_code == 304 else tuple(answer)
+
+async def async_fetch_http_answer(session, link, head_only=False, request_headers=None):
+    """aiohttp counterpart of fetch_http_answer(). Returns (status_code, headers, (metadata, reason))."""
+    async with session.get(link, headers=request_headers) as response:
+        content_type = response.headers.get('Content-Type', '')
+        status_code = response.status
+        if status_code == 304:
+            return status_code, response.headers, None
+        if 'html' not in content_type.lower():
+            if status_code >= 400:
+                response.close()
+                return status_code, response.headers, answer_failed_status(status_code)
+            info = preflight_info(status_code, response.headers, 'GET', await response.content.read(preflight_range_bytes))
+            if info['kind'] not in (None, 'html'):
+                response.close()
+                return status_code, response.headers, (await asyncio.to_thread(answer_non_html, link, info, 'http'), None)
+            return status_code, response.headers, (None, f"content_type:{content_type.split(';')[0] or 'unknown'}")
+        if head_only:
+            stream = HeadStream(charset_from_content_type(content_type))
+            async for chunk in response.content.iter_chunked(stream_chunk_size):
+                if stream.feed(chunk):
+                    break
+            stream.finish()
+            response.close()  # Drop the connection instead of draining the rest of the body
+            return status_code, response.headers, answer_from_head(status_code, stream)
+        body, abort_reason = bytearray(), None  # The session's total timeout is the deadline here
+        async for chunk in response.content.iter_chunked(stream_chunk_size):
+            body += chunk
+            if len(body) >= body_byte_cap:
+                body, abort_reason = body[:body_byte_cap], 'byte_cap'
+                response.close()
+                break
+        html = bytes(body).decode(charset_from_content_type(content_type), errors='replace')
+    answer = await asyncio.get_running_loop().run_in_executor(None, answer_from_html, status_code, html, len(body), abort_reason)
+    return status_code, response.headers, answer
+
+async def probe_links_async(search_results, concurrency=500, per_host=http_per_host_limit, browser_pool=None, watchdog=None,
+                            browser_executor=None, load_budget=None, head_only=False):
+    """Probe every link over HTTP with at most `concurrency` fetches in flight and hand escalations
+    to `browser_executor`. Returns results in input order."""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(session, link):
+        async with semaphore:
+            try:
+                if session is None:
+                    return await asyncio.to_thread(http_probe, link, head_only)
+                return await async_http_probe(session, link, head_only)
+            except http_errors + (asyncio.TimeoutError,) as e:
+                return None, f"http_error:{type(e).__name__}"
+            except Exception as e:
+                if aiohttp and isinstance(e, aiohttp.ClientError):
+                    return None, f"http_error:{type(e).__name__}"
+                raise
+
+    async def probe(session, item):
+        if resolver is None:
+            short_circuit = await asyncio.to_thread(dns_short_circuit, item['link'])
+        else:
+            short_circuit = await resolver.short_circuit(item['link'])
+        if short_circuit is not None:
+            return short_circuit
+        metadata, reason = await fetch(session, item['link'])
+        if metadata is not None:
+            return link_result(item['link'], metadata, None)
+        return await loop.run_in_executor(
+            browser_executor,
+            functools.partial(escalate_to_browser, item, reason, browser_pool, None, watchdog, load_budget)
+        )
+
+    resolver = None
+    if aiohttp is None:
+        logger.warning("aiohttp is not installed; the async engine is running the HTTP tier in threads")
+        return await asyncio.gather(*(probe(None, item) for item in search_results))
+
+    resolver = async_resolver()
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, resolver=resolver, use_dns_cache=False,
+                                     ssl=make_ssl_context(), keepalive_timeout=30)
+    timeout = aiohttp.ClientTimeout(total=http_timeout)
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=http_headers,
+                                         trace_configs=[aiohttp_trace_config()]) as session:
+            return await asyncio.gather(*(probe(session, item) for item in search_results))
+    finally:
+        await resolver.close()
+
+def test_links_async(search_results, concurrency=500, browser_workers=4, run_stats=None, profile='full', load_budget=None,
+                     head_only=False):
+    """Test links with the asyncio engine: a semaphore-bounded HTTP tier with async DNS, plus a separate
+    bounded executor of `browser_workers` threads for browser escalations.
+    Returns results in the same shape as test_links_concurrently."""
+    pool = link_probe_pool(size=browser_workers, profile=profile)
+    watchdog = ProbeWatchdog(registry=pool.registry)
+    http_start = http_metrics.snapshot()
+    try:
+        with ThreadPoolExecutor(max_workers=browser_workers, thread_name_prefix='browser-escalation') as browser_executor:
+            results = asyncio.run(probe_links_async(
+                search_results, concurrency=concurrency, browser_pool=pool, watchdog=watchdog,
+                browser_executor=browser_executor, load_budget=load_budget, head_only=head_only
+            ))
+    finally:
+        watchdog.stop()
+        pool.shutdown()
+    if run_stats is not None:
+        run_stats.update({"probe_mode": "async", "probe_profile": pool.profile, "async_concurrency": concurrency})
+        run_stats.update(tier_stats(results))
+        run_stats.update(http_metrics.stats(since=http_start))
+        run_stats.update(pool.stats())
+        run_stats.update(pool.registry.stats())
+        run_stats.update(watchdog.stats())
+    return list(results)
+
+def generate_report(test_results, query_topic, run_stats=None):
     """Generate a text-based report summarizing the test results.
       Args:     test_results (list): dictionaries list containing test results 
                 query_topic (str): The search query topic used for testing.
+                run_stats (dict): Optional run statistics (driver pool, etc.) to summarize.
       Returns   str: A formatted string representing the report.
       """
     success_count = sum(1 for result in test_results if result['status'] == 'success')
-    error_count = len(test_results) - success_count
+    partial_count = sum(1 for result in test_results if result['status'] == 'partial')
+    non_html_count = sum(1 for result in test_results if result['status'] == 'non_html')
+    skipped_count = sum(1 for result in test_results if result['status'] == 'skipped')
+    timeout_count = sum(1 for result in test_results if result['status'] == 'timeout')
+    blocked_count = sum(1 for result in test_results if result['status'] == 'blocked')
+    error_count = len(test_results) - success_count - partial_count - non_html_count - skipped_count - timeout_count - blocked_count
 
     report_lines = [
         f"Link Scrape Test Report for query: {query_topic}",
         f"Total Links Tested: {len(test_results)}",
         f"Total Successes: {success_count}",
+        f"Total Partial Results: {partial_count}",
+        f"Total Non-HTML Documents: {non_html_count}",
+        f"Total Skipped (robots.txt): {skipped_count}",
         f"Total Errors: {error_count}",
-        "",
-        "Details:"
+        f"Total Timeouts: {timeout_count}",
+        f"Total Blocked: {blocked_count}",
+        ""
     ]
 
+    if run_stats:
+        report_lines.append("Run Summary:")
+        for key, value in run_stats.items():
+            report_lines.append(f"{key}: {value}")
+        report_lines.append("")
+
+    report_lines.append("Details:")
+
     for result in test_results:
+        tier = f" - Tier: {result['tier']}" if 'tier' in result else ""
         if result['status'] == 'success':
             report_lines.append(
-                f"SUCCESS: {result['link']} - Title: {result['title']} - Description: {result['description']} - Keywords: {result['keywords']}"
+                f"SUCCESS: {result['link']} - Title: {result['title']} - Description: {result['description']} - Keywords: {result['keywords']}{tier}"
+            )
+        elif result['status'] == 'partial':
+            report_lines.append(
+                f"PARTIAL ({result['elapsed_s']}s): {result['link']} - Title: {result['title']} - Description: {result['description']} - Keywords: {result['keywords']}{tier}"
+            )
+        elif result['status'] == 'non_html':
+            report_lines.append(
+                f"NON-HTML ({result['content_type']}): {result['link']} - Title: {result['title']} - Author: {result.get('author')} - Size: {result['content_length']}"
             )
         else:
-            report_lines.append(f"ERROR: {result['link']} - Error: {result['error']}")
+            report_lines.append(f"{result['status'].upper()}: {result['link']} - Error: {result['error']}{tier}")
 
     return "\n".join(report_lines)
 
@@ -263,8 +3444,12 @@ def save_report_to_csv(test_results, query_topic):
     """ 
     timestamped_csv = timestamped_filename("Google_links_scrape_report.csv")
     with open(timestamped_csv, mode='w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ['link', 'status', 'title', 'description', 'keywords', 'error']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        fieldnames = ['link', 'status', 'title', 'description', 'keywords', 'canonical', 'robots', 'lang',
+                      'link_count', 'table_count', 'form_count', 'elapsed_s', 'tier', 'escalation_reason',
+                      'http_status', 'bytes_read', 'abort_reason', 'document_kind', 'content_type', 'content_length',
+                      'author', 'final_url', 'redirect_count', 'server', 'robots_txt', 'crawl_delay', 'robots_status',
+                      'error']
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')  # Nested/extra fields stay in the JSON output
 
         writer.writeheader()
         for result in test_results:
@@ -277,44 +3462,69 @@ def main():
     st.title('Scrape Tester 100')
     st.write('The program uses the Chrome web browser to perform a Google search query based on user input. It collects the HTML information from the Google search pages for a minimum of 100 items. Those items are parsed into a dictionary of 100 links along with their title and snippet. The links are individually tested to see if they can be web scraped. The results are outputted to a test results report.')
     query = st.text_input('Please enter the Google search query:')
+    probe_mode = st.selectbox('Link probe mode:', ['Browser pool', 'Tabs in shared browsers', 'Async HTTP engine'])
+    tiered = st.checkbox('Try plain HTTP first and launch Chrome only when needed (browser pool mode)', value=True)
+    head_only = st.checkbox('Stream only the <head> of each page in the HTTP tier', value=True)
+    preflight = st.checkbox('Preflight content types so PDFs, images, feeds and other non-HTML links skip the probe', value=True)
+    skip_disallowed = st.checkbox('Skip links disallowed by robots.txt', value=False)
+    large_pages = st.checkbox('Request 100 results per search page (falls back to normal paging when ignored)', value=True)
+    fanout = st.checkbox('Fetch search result pages in parallel instead of clicking through them', value=False)
+    fanout_parallel = st.number_input('Search pages loaded at once (parallel fetch):', min_value=1, max_value=10,
+                                      value=serp_fanout_parallel)
+    lean_probe = st.checkbox('Lean metadata probe (eager load, block images/media/fonts/CSS and ad hosts)', value=True)
+    load_budget = st.number_input('Page load budget in seconds (0 = wait for the full load):', min_value=0, value=0)
 
     if query:
         if st.button('Run Scrape Test'):
+            resolve_chrome_paths()  # Resolve chromedriver once up front instead of on every launch
             progress_bar = st.progress(0)
             status_text = st.empty()
             step = 0
             total_steps = 7  # Update this if you add or remove steps
 
             # Step 1: Initialize loader
-            loader = GoogleSearchLoader(query=query)
+            loader = GoogleSearchLoader(query=query, large_pages=large_pages)
             step += 1
             progress_bar.progress(step / total_steps)
             status_text.text("Initialized GoogleSearchLoader...")
 
-            # Step 2: Load and scroll through the search results, then save the HTML content
-            html_content = loader.load_and_scroll()
-            html_filename = loader.save_html(html_content)
+            # Step 2: Load the search result pages; each page is parsed, deduplicated and saved as it arrives
+            html_filename = timestamped_filename("Google_search_results.html")
+            search_results = []
+            with open(html_filename, 'w', encoding='utf-8') as html_file:
+                pages = loader.load_fanout(max_parallel=fanout_parallel, include_html=True) if fanout \
+                    else loader.load_and_scroll(include_html=True)
+                for page in pages:
+                    html_file.write(page['html'])
+                    search_results.extend(page['results'])
+                    dns_cache.prefetch(link_hosts(page['results']))  # Resolve hosts in the background while the pipeline continues
+                    status_text.text(f"Search page {page['page']}: {len(page['results'])} new results, {len(search_results)} in total")
             st.write(f"HTML content saved to {html_filename}")
             step += 1
             progress_bar.progress(step / total_steps)
             status_text.text("HTML content loaded and saved...")
 
-            # Step 3: Parse the HTML content to extract search results
-            search_results = loader.parse_items(html_content)
+            # Step 3: Results were parsed, canonicalized and deduplicated page by page
             st.write(f"Extracted {len(search_results)} items.")
             step += 1
             progress_bar.progress(step / total_steps)
             status_text.text("Search results parsed...")
 
-            # Step 4: Ensure we have at least 100 unique links
+            # Step 4: Resume paging from the loader's cursor until we have 100 unique links or paging stops for good
+            resumes = 0
+            while len(search_results) < 100 and loader.can_resume() and resumes < serp_max_resumes:
+                resumes += 1
+                st.write(f"Collected only {len(search_results)} links ({loader.stop_reason}), resuming from the next unseen page...")
+                with open(html_filename, 'a', encoding='utf-8') as html_file:  # Resumed pages join the saved SERP HTML
+                    for page in loader.load_and_scroll(include_html=True):
+                        html_file.write(page['html'])
+                        search_results.extend(page['results'])
+                        dns_cache.prefetch(link_hosts(page['results']))
+                        status_text.text(f"Search page {page['page']}: {len(page['results'])} new results, {len(search_results)} in total")
+                st.write(f"Collected {len(search_results)} links so far...")
             if len(search_results) < 100:
-                st.write(f"Collected only {len(search_results)} links, retrying to get more...")
-                while len(search_results) < 100:
-                    html_content = loader.load_and_scroll()
-                    search_results.extend(loader.parse_items(html_content))
-                    search_results = list({item['link']: item for item in search_results if item['link']}.values())
-                    st.write(f"Collected {len(search_results)} links so far...")
-               
+                st.write(f"Search paging stopped with {len(search_results)} links: {loader.stop_reason}")
+
             # Save the parsed search results to a JSON file
             json_filename = loader.save_results_to_json(search_results[:100])  # Ensure we have at most 100 links
             st.write(f"Parsed search results saved to {json_filename}")
@@ -327,7 +3537,26 @@ def main():
                 search_results = json.load(f)
 
             # Step5: Test the links concurrently and save the results
-            test_results = test_links_concurrently(search_results)
+            run_stats = {**loader.stats, **loader.url_index.stats()}
+            profile = 'metadata' if lean_probe else 'full'
+            http_cache_start = http_cache.snapshot()
+            search_results, robots_skipped, robots_annotations = check_robots(search_results, skip_disallowed, run_stats=run_stats)
+            preflight_results = []
+            if preflight:
+                search_results, preflight_results = preflight_links(search_results, run_stats=run_stats)
+            if probe_mode == 'Async HTTP engine':
+                test_results = test_links_async(search_results, run_stats=run_stats, profile=profile, load_budget=load_budget or None,
+                                                head_only=head_only)
+            elif probe_mode == 'Tabs in shared browsers':
+                test_results = test_links_multiplexed(search_results, run_stats=run_stats, profile=profile, load_budget=load_budget or None)
+            else:
+                test_results = test_links_concurrently(search_results, run_stats=run_stats, profile=profile, load_budget=load_budget or None,
+                                                       tiered=tiered, head_only=head_only)
+            test_results = robots_skipped + preflight_results + test_results
+            for result in test_results:
+                result.update(robots_annotations.get(result['link'], {}))
+            run_stats.update(dns_cache.stats())
+            run_stats.update(http_cache.stats(since=http_cache_start))
             output_filename = timestamped_filename('parsed_Google_links_scrape_test.json')
             with open(output_filename, 'w', encoding='utf-8') as f:
                 json.dump(test_results, f, ensure_ascii=False, indent=4)
@@ -337,7 +3566,7 @@ def main():
             status_text.text("Tested links and saved results...")
 
             # Step 6: Generate the report
-            report = generate_report(test_results, query)
+            report = generate_report(test_results, query, run_stats)
             report_filename = timestamped_filename('Google_links_scrape_report.txt')
             
             # Prettify the text report
@@ -377,16 +3606,33 @@ def main():
             status_text.text("Prettified and saved the CSV report...")
 
             # Completion
+            st.write(f"Live browsers after run: {get_driver_registry().live_count()}")
             st.success("All tasks completed successfully!")
             progress_bar.empty()  # Clear the progress bar
 
-if __name__ == "__main__":
+def parse_broker_args(argv):
+    """Parse command-line options for running the browser broker."""
+    parser = argparse.ArgumentParser(description="Run the shared browser broker.")
+    parser.add_argument('--broker', action='store_true', help="Run the browser broker instead of the Streamlit app.")
+    parser.add_argument('--socket', default=broker_socket_path, help="Unix socket path to listen on.")
+    parser.add_argument('--capacity', type=int, default=10, help="Maximum number of concurrent browsers.")
+    parser.add_argument('--profile', default='full', choices=sorted(probe_profiles), help="Probe profile for the browsers.")
+    parser.add_argument('--warm', type=int, default=0, help="Number of browsers to launch at startup.")
+    parser.add_argument('--max-lease', type=int, default=600, help="Upper bound in seconds on any lease.")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__" and '--broker' in sys.argv:
+    args = parse_broker_args(sys.argv[1:])
+    try:
+        run_broker(args.socket, args.capacity, args.profile, args.warm, args.max_lease)
+    finally:
+        get_driver_registry().shutdown()
+elif __name__ == "__main__":
     try:
         main()
     except Exception as e:
         logger.error(f"An error occurred when running the program: {str(e)}")
-    finally:
-        # Ensure all WebDriver instances are closed
-        for driver in drivers:
-            driver.quit()
+    # No registry shutdown here: Streamlit re-executes this block on every rerun while the registry is shared
+    # by all sessions. Each run quits only the drivers it launched (its pools and SERP sessions close their own),
+    # and the atexit hook registered by get_driver_registry() shuts the registry down when the process exits.
         
\ No newline at end of file